@@ -6,7 +6,10 @@ from scipy.linalg import expm
 from matplotlib.widgets import *
 from tkinter import Tk
 from tkinter.filedialog import asksaveasfilename
-from oscillator_math import OscillatorMath
+from oscillator_math import OscillatorMath, CalculateWorkspace
+from blit_manager import BlitManager
+from decimation import DecimatedLine
+from profiling import Profiler, PerfOverlay
 
 def oscillator_math_old(mass, stiffness, damping_coefficient=0):
     t = np.arange(0, 200, 1)
@@ -73,144 +76,187 @@ def oscillator_math(mass,stiffness,damping_coefficient=0,x0=1,v0=0,t=None):
         x = A * np.exp(r1*t)+B * np.exp(r2*t)
     return x
 
-# init
-om=OscillatorMath()
-
-fig = plt.figure()
-ax = fig.subplots()
-ax.set_xlim(0, 210)
-ax.set_ylim(-1.5, 1.5)
-line1,=ax.plot(0,0, label='Displacement x(t)')
-line2,=ax.plot(0,0, label='Envelope(underdamped)', linestyle='--')
-peaks=ax.scatter([],[],color='red',marker='o',label='Peaks')
-valleys=ax.scatter([],[],color='blue',marker='o',label='Valleys')
-zeros=ax.scatter([],[],color='black',marker='o',label='Zeros')
-
-
-
-# init
-plt.get_current_fig_manager().set_window_title('Oscillator')
-plt.get_current_fig_manager().resize(1200,800)
-plt.subplots_adjust(left=0.5,right=0.95,top=0.9, bottom=0.3)
-
-x_init = 0.08; x_init_right=0.35; y_init = 0.9; y_space=0.05; comp_width = 0.03
-slider_length=0.3; textbox_length=0.07
-
-# sliders
-axe_mass = plt.axes([x_init, y_init-1*y_space, slider_length, comp_width])
-axe_stiffness = plt.axes([x_init, y_init-4*y_space, slider_length, comp_width])
-axe_damping_coefficient = plt.axes([x_init, y_init-7*y_space, slider_length, comp_width])
-
-mass_slider = Slider(axe_mass,'',valmin=0,valmax=100,valinit=10,valstep=0.01,valfmt='%.2f')
-stiffness_slider = Slider(axe_stiffness,'',valmin=0.0,valmax=2.0,valinit=0.5,valstep=0.01,valfmt='%.2f')
-damping_coefficient_slider = Slider(axe_damping_coefficient,'',valmin=0,valmax=2,valinit=0,valstep=0.01,valfmt='%.2f')
-
-# textboxes
-axe_mass_text = plt.axes([x_init, y_init, textbox_length, comp_width])
-axe_stiffness_text = plt.axes([x_init, y_init-3*y_space, textbox_length, comp_width])
-axe_damping_coefficient_text = plt.axes([x_init, y_init-6*y_space, textbox_length, comp_width])
-
-mass_text = TextBox(axe_mass_text,'Mass')
-stiffness_text = TextBox(axe_stiffness_text,'Stiffness')
-damping_coefficient_text = TextBox(axe_damping_coefficient_text,'Damping-Co')
-
-# buttons
-axe_reset = plt.axes([x_init, 1-y_init, textbox_length, comp_width])
-axe_input = plt.axes([x_init_right, 1-y_init, textbox_length, comp_width])
-axe_save_file = plt.axes([x_init_right-0.1, 1-y_init, textbox_length, comp_width])
-axe_close_window = plt.axes([0.9, 1-y_init, textbox_length, comp_width])
-
-reset_button = Button(axe_reset, 'Reset', hovercolor='0.95')
-input_button = Button(axe_input, 'Input', hovercolor='0.95')
-save_button = Button(axe_save_file, 'Save', hovercolor='0.95')
-close_button = Button(axe_close_window, 'Close', hovercolor='red')
-
-# func reset button
-def reset(event):
-    mass_slider.reset()
-    stiffness_slider.reset()
-    damping_coefficient_slider.reset()
-reset_button.on_clicked(reset)
-
-
-# TODO func input button
-# input_button.on_clicked()
-
-# func save button
-def save(val):
-    root = Tk()
-    root.withdraw()
-    filename = asksaveasfilename(
-        defaultextension=".png",
-        filetypes=[
-            ("PNG Image", "*.png"),
-            ("JPEG Image", "*.jpg"),
-            ("All Files", "*.*"),
-        ],
-    )
-    root.destroy()
-    plt.savefig(filename)
-save_button.on_clicked(save)
-
-# func close button
-def close(val):
-    plt.close()
-close_button.on_clicked(close)
-
-# func update data
-def update(val):
-    mass = mass_slider.val
-    stiffness = stiffness_slider.val
-    damping_coefficient = damping_coefficient_slider.val
-    mass_text.set_val(mass)
-    stiffness_text.set_val(stiffness)
-    damping_coefficient_text.set_val(damping_coefficient)
-    t = np.linspace(0, 200, 1000)
-
-    om.update_value('mass',mass)
-    om.update_value('stiffness',stiffness)
-    om.update_value('damping_coefficient',damping_coefficient)
-    om.update_value('t',t)
-
-
-    results = om.calculate()
-    x=results['x']
-    if results['envelope'] is not None and results['crit_points'] is not None:
-        envelope = results['envelope']
-        crit_points = results['crit_points']
-        line2.set_data(t,envelope)
-        p_t,p_x = zip(*crit_points['peaks'])
-        v_t,v_x = zip(*crit_points['valleys'])
-        z_t,z_x = zip(*crit_points['zeros'])
-        ps = np.column_stack((p_t, p_x))
-        vs = np.column_stack((v_t, v_x))
-        zs = np.column_stack((z_t, z_x))
-        peaks.set_offsets(ps)
-        valleys.set_offsets(vs)
-        zeros.set_offsets(zs)
-
-
-    line1.set_data(t,x)
-    fig.canvas.draw_idle()
-
-# func change text -> change slider
-def update_by_text(text,target):
-    target.set_val(float(text))
-mass_text.on_submit(lambda text: update_by_text(text, mass_slider))
-stiffness_text.on_submit(lambda text: update_by_text(text, stiffness_slider))
-damping_coefficient_text.on_submit(lambda text: update_by_text(text, damping_coefficient_slider))
-
-# func change slider -> update
-mass_slider.on_changed(update)
-stiffness_slider.on_changed(update)
-damping_coefficient_slider.on_changed(update)
-
-# pltshow
-ax.legend()
-ax.grid(True)
-update(None)
-
-plt.show()
+class OscillatorDashboard:
+    """
+    pyplot dashboard, built only when launched (python Oscillator.py), importing this module has no side effects
+    """
+
+    def __init__(self):
+        # init
+        self.om=OscillatorMath()
+        # fixed grid, every update is computed in place into these buffers
+        self.workspace = CalculateWorkspace(np.linspace(0, 200, 1000))
+
+        self.fig = plt.figure()
+        self.ax = ax = self.fig.subplots()
+        ax.set_xlim(0, 210)
+        ax.set_ylim(-1.5, 1.5)
+        self.line1,=ax.plot(0,0, label='Displacement x(t)')
+        self.line2,=ax.plot(0,0, label='Envelope(underdamped)', linestyle='--')
+        self.peaks=ax.scatter([],[],color='red',marker='o',label='Peaks')
+        self.valleys=ax.scatter([],[],color='blue',marker='o',label='Valleys')
+        self.zeros=ax.scatter([],[],color='black',marker='o',label='Zeros')
+        # min/max per pixel column, full resolution data stays in lod.t / lod.y
+        self.line1_lod = DecimatedLine(self.line1)
+        self.line2_lod = DecimatedLine(self.line2)
+        # stage timings, on with OSCILLATOR_PROFILE=1
+        self.profiler = Profiler('Oscillator')
+        self.overlay = PerfOverlay(ax, self.profiler)
+
+        # init
+        plt.get_current_fig_manager().set_window_title('Oscillator')
+        plt.get_current_fig_manager().resize(1200,800)
+        plt.subplots_adjust(left=0.5,right=0.95,top=0.9, bottom=0.3)
+
+        x_init = 0.08; x_init_right=0.35; y_init = 0.9; y_space=0.05; comp_width = 0.03
+        slider_length=0.3; textbox_length=0.07
+
+        # sliders
+        axe_mass = plt.axes([x_init, y_init-1*y_space, slider_length, comp_width])
+        axe_stiffness = plt.axes([x_init, y_init-4*y_space, slider_length, comp_width])
+        axe_damping_coefficient = plt.axes([x_init, y_init-7*y_space, slider_length, comp_width])
+
+        self.mass_slider = Slider(axe_mass,'',valmin=0,valmax=100,valinit=10,valstep=0.01,valfmt='%.2f')
+        self.stiffness_slider = Slider(axe_stiffness,'',valmin=0.0,valmax=2.0,valinit=0.5,valstep=0.01,valfmt='%.2f')
+        self.damping_coefficient_slider = Slider(axe_damping_coefficient,'',valmin=0,valmax=2,valinit=0,valstep=0.01,
+                                                 valfmt='%.2f')
+        self.sliders = (self.mass_slider, self.stiffness_slider, self.damping_coefficient_slider)
+        # sliders are re-rendered by the blit manager instead of a full draw_idle
+        for slider in self.sliders:
+            slider.drawon = False
+
+        # textboxes
+        axe_mass_text = plt.axes([x_init, y_init, textbox_length, comp_width])
+        axe_stiffness_text = plt.axes([x_init, y_init-3*y_space, textbox_length, comp_width])
+        axe_damping_coefficient_text = plt.axes([x_init, y_init-6*y_space, textbox_length, comp_width])
+
+        self.mass_text = TextBox(axe_mass_text,'Mass')
+        self.stiffness_text = TextBox(axe_stiffness_text,'Stiffness')
+        self.damping_coefficient_text = TextBox(axe_damping_coefficient_text,'Damping-Co')
+        self.textboxes = (self.mass_text, self.stiffness_text, self.damping_coefficient_text)
+
+        # buttons
+        axe_reset = plt.axes([x_init, 1-y_init, textbox_length, comp_width])
+        axe_input = plt.axes([x_init_right, 1-y_init, textbox_length, comp_width])
+        axe_save_file = plt.axes([x_init_right-0.1, 1-y_init, textbox_length, comp_width])
+        axe_close_window = plt.axes([0.9, 1-y_init, textbox_length, comp_width])
+
+        self.reset_button = Button(axe_reset, 'Reset', hovercolor='0.95')
+        self.input_button = Button(axe_input, 'Input', hovercolor='0.95')
+        self.save_button = Button(axe_save_file, 'Save', hovercolor='0.95')
+        self.close_button = Button(axe_close_window, 'Close', hovercolor='red')
+
+        self.reset_button.on_clicked(self.reset)
+        # TODO func input button
+        # input_button.on_clicked()
+        self.save_button.on_clicked(self.save)
+        self.close_button.on_clicked(self.close)
+
+        # func change text -> change slider
+        for textbox, slider in zip(self.textboxes, self.sliders):
+            textbox.on_submit(lambda text, target=slider: self.update_by_text(text, target))
+        # func change slider -> update
+        for slider in self.sliders:
+            slider.on_changed(self.update)
+
+        # pltshow
+        # fixed location: loc='best' would search the data on every blit
+        ax.legend(loc='upper right')
+        ax.grid(True)
+        # only the curves, the markers and the widget values change between frames
+        self.bm = BlitManager(self.fig.canvas, [self.line1, self.line2, self.peaks, self.valleys, self.zeros])
+        # the slider axes as a whole (track, fill, handle, value text), a few hundred pixels each
+        for slider in self.sliders:
+            self.bm.add_artist(slider.ax)
+        for textbox in self.textboxes:
+            self.bm.add_artist(textbox.text_disp)
+        # keep the legend above the curves
+        self.bm.add_artist(ax.get_legend())
+        self.bm.add_artist(self.overlay.text)
+        self.update(None)
+
+    # func reset button
+    def reset(self, event):
+        for slider in self.sliders:
+            slider.reset()
+
+    # func save button
+    def save(self, val):
+        root = Tk()
+        root.withdraw()
+        filename = asksaveasfilename(
+            defaultextension=".png",
+            filetypes=[
+                ("PNG Image", "*.png"),
+                ("JPEG Image", "*.jpg"),
+                ("All Files", "*.*"),
+            ],
+        )
+        root.destroy()
+        # animated artists are skipped by a normal draw
+        with self.bm.suspended():
+            self.fig.savefig(filename)
+
+    # func close button
+    def close(self, val):
+        if self.profiler.enabled:
+            self.profiler.dump()
+        plt.close(self.fig)
+
+    # show a value in a textbox without TextBox.set_val, which forces a full canvas.draw()
+    @staticmethod
+    def show_val(textbox, val):
+        if not textbox.capturekeystrokes:
+            textbox.text_disp.set_text(str(val))
+
+    # func update data
+    def update(self, val):
+        om = self.om
+        mass = self.mass_slider.val
+        stiffness = self.stiffness_slider.val
+        damping_coefficient = self.damping_coefficient_slider.val
+        self.show_val(self.mass_text, mass)
+        self.show_val(self.stiffness_text, stiffness)
+        self.show_val(self.damping_coefficient_text, damping_coefficient)
+        t = self.workspace.t
+
+        om.update_value('mass',mass)
+        om.update_value('stiffness',stiffness)
+        om.update_value('damping_coefficient',damping_coefficient)
+        om.update_value('t',t)
+
+        with self.profiler.span('calculate'):
+            results = om.calculate(all_crit_points=True, workspace=self.workspace)
+        x=results['x']
+        with self.profiler.span('set_data'):
+            if results['envelope'] is not None:
+                self.line2_lod.set_data(t,results['envelope'])
+            # (n, 2) arrays of (t, x), ready for set_offsets
+            crit_points = results['crit_points']
+            self.peaks.set_offsets(crit_points['peaks'])
+            self.valleys.set_offsets(crit_points['valleys'])
+            self.zeros.set_offsets(crit_points['zeros'])
+            self.line1_lod.set_data(t,x)
+
+        self.overlay.update()
+        with self.profiler.span('draw'):
+            self.bm.update()
+        self.profiler.frame()
+
+    # func change text -> change slider
+    @staticmethod
+    def update_by_text(text,target):
+        target.set_val(float(text))
+
+
+def main():
+    dashboard = OscillatorDashboard()
+    plt.show()
+    return dashboard
+
+
+if __name__ == '__main__':
+    main()
 
 # -mx''=bx'+kx
 # x'2=-b/m*x2-k/m*x1
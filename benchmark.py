@@ -0,0 +1,168 @@
+"""
+benchmark for the numerical kernels:
+OscillatorMath.calculate / calculate_batch, the functional Oscillator.oscillator_math, the legacy
+per-sample expm loop Oscillator.oscillator_math_old and the integrator methods on the same grid,
+over all damping regimes and grid sizes.
+runs headless, results are saved as json so two commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import matplotlib
+
+# Oscillator imports pyplot, keep it off screen
+matplotlib.use('Agg')
+
+import numpy as np
+
+from integrator import METHODS, integrate_batch
+from oscillator_math import OscillatorMath
+
+# (mass, stiffness, damping_coefficient) per regime
+REGIMES = {
+    'underdamped': (1.0, 1.0, 0.2),
+    'critical': (1.0, 1.0, 2.0),
+    'overdamped': (1.0, 1.0, 5.0),
+}
+
+
+def load_oscillator():
+    import Oscillator
+    return Oscillator
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(fn, n_samples: int, repeat: int, min_time: float):
+    """
+    best-of-repeat wall time, then one traced run for memory.
+    peak_arrays = traced peak / bytes of one float64 output array, i.e. how many full-length
+    temporaries were alive at once (tracemalloc does not expose a raw allocation count).
+    """
+    fn()
+    best = float('inf')
+    for _ in range(repeat):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / loops)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {
+        'seconds': best,
+        'samples_per_second': n_samples / best,
+        'peak_bytes': peak,
+        'peak_arrays': peak / (8 * n_samples),
+    }
+
+
+def calculate_case(params, n, all_crit_points=False):
+    om = OscillatorMath()
+    om.update_params(list(params) + [1.0, 0.0])
+    om.t = np.linspace(0, 200, n)
+    return lambda: om.calculate(all_crit_points=all_crit_points)
+
+
+def cases(args):
+    sizes = [10 ** p for p in range(2, args.max_exponent + 1)]
+    oscillator = load_oscillator()
+    for regime, params in REGIMES.items():
+        for n in sizes:
+            yield {'kernel': 'calculate', 'regime': regime, 'n_t': n, 'batch': 1}, calculate_case(params, n), n
+            yield ({'kernel': 'calculate_crit', 'regime': regime, 'n_t': n, 'batch': 1},
+                   calculate_case(params, n, all_crit_points=True), n)
+            t = np.linspace(0, 200, n)
+            yield ({'kernel': 'functional', 'regime': regime, 'n_t': n, 'batch': 1},
+                   lambda p=params, t=t: oscillator.oscillator_math(*p, t=t), n)
+        for batch in args.batches:
+            n = max(args.batch_cells // batch, 100)
+            m, k, c = (np.full(batch, p) for p in params)
+            om = OscillatorMath()
+            t = np.linspace(0, 200, n)
+            yield ({'kernel': 'calculate_batch', 'regime': regime, 'n_t': n, 'batch': batch},
+                   lambda om=om, m=m, k=k, c=c, t=t: om.calculate_batch(m, k, c, 1.0, 0.0, t), n * batch)
+        if not args.skip_legacy:
+            # the legacy loop has a fixed grid of 200 samples
+            yield ({'kernel': 'legacy_expm', 'regime': regime, 'n_t': 200, 'batch': 1},
+                   lambda p=params: oscillator.oscillator_math_old(*p), 200)
+        # integrator backend on the legacy grid
+        t = np.arange(0, 200, 1.0)
+        for method in METHODS:
+            yield ({'kernel': f'integrate_{method}', 'regime': regime, 'n_t': 200, 'batch': 1},
+                   lambda p=params, method=method, t=t: integrate_batch(*p, 1.0, 0.0, t, method=method), 200)
+
+
+def compare(rows, path):
+    with open(path) as f:
+        old = {tuple(r['case'].values()): r for r in json.load(f)['results']}
+    print(f"\ncompared with {path} (ratio > 1: faster now)")
+    for row in rows:
+        before = old.get(tuple(row['case'].values()))
+        if before is not None:
+            ratio = before['seconds'] / row['seconds']
+            print(f"{format_case(row['case']):<55} {ratio:8.2f}x")
+
+
+def format_case(case):
+    return f"{case['kernel']:<16} {case['regime']:<12} n_t={case['n_t']:<9} batch={case['batch']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-exponent', type=int, default=6, help='largest grid is 10**max_exponent (max 7)')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--batch-cells', type=int, default=10 ** 6, help='n_params * n_t per batch case')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.05, help='seconds per timing repeat')
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier result file')
+    args = parser.parse_args()
+    args.max_exponent = min(args.max_exponent, 7)
+
+    rows = []
+    for case, fn, n_samples in cases(args):
+        result = measure(fn, n_samples, args.repeat, args.min_time)
+        rows.append({'case': case, **result})
+        print(f"{format_case(case):<55} {result['seconds'] * 1e3:10.3f} ms {result['samples_per_second']:12.3e} S/s "
+              f"{result['peak_bytes'] / 2 ** 20:9.2f} MiB {result['peak_arrays']:6.1f} arrays")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'revision': git_revision(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': rows,
+        }, f, indent=2)
+    print(f"saved {args.output}")
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == '__main__':
+    main()
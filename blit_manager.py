@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+
+class BlitManager:
+    """
+    blit renderer for a matplotlib canvas.
+    everything that is not animated (axes, widgets, legend, grid) is cached as a background on each
+    full draw; update() only restores that background and redraws the animated artists.
+    a resize drops the background, the full draw that follows recaptures it.
+    """
+
+    def __init__(self, canvas, animated_artists=()):
+        self.canvas = canvas
+        self._bg = None
+        self._artists = []
+        for artist in animated_artists:
+            self.add_artist(artist)
+        self.cid_draw = canvas.mpl_connect('draw_event', self.on_draw)
+        self.cid_resize = canvas.mpl_connect('resize_event', self.on_resize)
+
+    def add_artist(self, artist):
+        artist.set_animated(True)
+        self._artists.append(artist)
+
+    def on_draw(self, event):
+        if event is not None and event.canvas is not self.canvas:
+            # e.g. savefig rendering through a temporary canvas
+            return
+        self._bg = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def on_resize(self, event):
+        self._bg = None
+
+    def _draw_animated(self):
+        fig = self.canvas.figure
+        for artist in self._artists:
+            fig.draw_artist(artist)
+
+    def update(self):
+        if self._bg is None or not self.canvas.supports_blit:
+            # no background yet, the draw_event of this full draw will capture it
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
+
+    @contextmanager
+    def suspended(self):
+        """
+        render the animated artists as normal ones, e.g. for savefig
+        """
+        for artist in self._artists:
+            artist.set_animated(False)
+        try:
+            yield
+        finally:
+            for artist in self._artists:
+                artist.set_animated(True)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.cid_draw)
+        self.canvas.mpl_disconnect(self.cid_resize)
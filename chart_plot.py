@@ -0,0 +1,260 @@
+import copy
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from decimation import DecimatedLine, minmax_decimate_rows
+from oscillator_math import OscillatorMath
+from profiling import PerfOverlay
+from result_cache import ResultCache
+
+
+def render_traces(segments, values, xlim, ylim, size, dpi: float, cmap='viridis', linewidth: float = 1.0):
+    """
+    draw segments (one polyline per row, coloured by values) with Agg into a transparent RGBA image of
+    size (width, height) px covering xlim x ylim. a figure of its own, no shared state, so it runs on the worker
+    thread and the Tk thread only shows the image
+    :return: (height, width, 4) uint8
+    """
+    width, height = size
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    fig.patch.set_alpha(0.0)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    collection = LineCollection(segments, cmap=cmap, linewidths=linewidth)
+    collection.set_array(values)
+    collection.set_clim(values.min(), values.max())
+    ax.add_collection(collection, autolim=False)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+def padded_limits(low, high, margin: float):
+    """(low, high) widened by margin * span on both sides like autoscale, or None if not finite"""
+    if not (np.isfinite(low) and np.isfinite(high)):
+        return None
+    span = high - low if high > low else max(abs(low), 1.0)
+    return low - margin * span, high + margin * span
+
+
+class ChartPlot:
+    """
+    ChartWindow's plot pipeline without Tk: figure, update_plot -> compute -> apply_plot, overlay sweep.
+    subclasses provide inputs (get_value / set_value), scheduler (request), worker (submit), canvas (draw)
+    and profiler: ChartWindow with widgets and a worker thread, ui_replay.HeadlessChart synchronously on Agg
+    """
+    om = OscillatorMath()
+    cache = ResultCache()
+    # 时间轴由系统自身的时间尺度决定 (OscillatorMath.adaptive_grid), False: 固定 0-10 s
+    adaptive = True
+    # 相图 (x, v) 最多画这么多点, 按步长抽样
+    phase_points = 5000
+    # 实时回放: 可见时间窗 (s)
+    playback_window = 10.0
+    playback = None
+    # 叠加模式: (parameter name, values) -> one calculate_batch, the traces are rendered on the worker thread into
+    # one image per axes, so the Tk redraw does not depend on the number of traces
+    sweep = None
+    # samples per trace on the shared adaptive grid of a sweep, at most sweep_sample_budget over all traces
+    sweep_samples = 4000
+    sweep_sample_budget = 200000
+    # vertices per axes over all traces of a sweep (render cost on the worker)
+    sweep_points = 60000
+
+    def build_figure(self, figsize=(5, 4)):
+        """Figure 和 artists"""
+        self.fig = Figure(figsize=figsize, dpi=100)
+        self.ax, self.ax_phase = self.fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 2]})
+        self.ax.set_title("Real-time Data Plot")
+        self.ax.set_xlabel("X Axis")
+        self.ax.set_ylabel("Amplitude")
+        self.line, = self.ax.plot([], [], 'r-')  # 初始化空线条
+        self.line_lod = DecimatedLine(self.line)  # 按像素列降采样, 完整数据在 line_lod.t / line_lod.y
+        # phase portrait x vs v
+        self.ax_phase.set_xlabel("Displacement x")
+        self.ax_phase.set_ylabel("Velocity v")
+        self.phase_line, = self.ax_phase.plot([], [], 'b-', linewidth=1)
+        # playback artists, only visible (and blitted) while playing
+        self.play_line, = self.ax.plot([], [], 'r-', visible=False)
+        self.play_phase, = self.ax_phase.plot([], [], 'b-', linewidth=1, visible=False)
+        self.play_marker, = self.ax_phase.plot([], [], 'ro', visible=False)
+        self.play_text = self.ax.text(0.99, 0.97, '', transform=self.ax.transAxes, ha='right', va='top',
+                                      visible=False)
+        # overlay sweep: one pre-rendered image per axes, coloured by the swept value (colorbar from the mappable)
+        self.sweep_images = [ax.imshow(np.zeros((1, 1, 4)), aspect='auto', interpolation='none', visible=False,
+                                       zorder=2) for ax in (self.ax, self.ax_phase)]
+        self.sweep_mappable = ScalarMappable(cmap='viridis')
+        self.sweep_cax = self.ax.inset_axes([0.6, 0.9, 0.37, 0.04], visible=False)
+        self.sweep_colorbar = self.fig.colorbar(self.sweep_mappable, cax=self.sweep_cax, orientation='horizontal')
+        self.fig.tight_layout()
+        # 时间轴只生成一次 (calculate 的默认网格)
+        self.t_grid = np.linspace(0, 10, 500)
+        self.overlay = PerfOverlay(self.ax, self.profiler)
+
+    def update_plot(self):
+        # 获取所有滑块的值
+        params = [inp.get_value() for inp in self.inputs]
+
+        # 使用 params[0] 控制幅度, params[1] 控制频率, 这里的逻辑可以自定义
+        self.om.update_params(params)
+        if self.playback is not None:
+            # mass / stiffness / damping change the running playback from its current state
+            self.playback.retune(params[:3])
+            self.fit_playback_axes()
+            return
+        self.om.t = None if self.adaptive else self.t_grid
+        # the worker gets its own copy, om may change again before the job runs
+        if self.sweep is not None:
+            self.worker.submit(self.compute_sweep, copy.copy(self.om), *self.sweep, self.sweep_view())
+            return
+        self.worker.submit(self.compute, copy.copy(self.om))
+
+    def compute(self, om):
+        """runs on the worker thread"""
+        with self.profiler.span('calculate'):
+            return self.cache.calculate(om, adaptive=self.adaptive, derivatives=True)
+
+    def sweep_view(self):
+        """pixel size of both axes and the dpi, on the Tk thread for the worker"""
+        return {'sizes': [(max(int(round(ax.bbox.width)), 1), max(int(round(ax.bbox.height)), 1))
+                          for ax in (self.ax, self.ax_phase)],
+                'dpi': self.fig.dpi}
+
+    def compute_sweep(self, om, name, values, view):
+        """
+        runs on the worker thread: every value of the swept parameter in one calculate_batch on a shared grid,
+        sweep_points vertices per axes over all traces, rendered into an image per axes (render_traces).
+        velocity only for the phase portrait's samples, not for the whole grid
+        :return: dict{'sweep', 'images': [(rgba, extent)] per axes, None where the limits are not finite}
+        """
+        n = len(values)
+        with self.profiler.span('calculate'):
+            if self.adaptive:
+                # every member's own horizon (adaptive_grid with 2 samples is just [0, horizon]), the grid spans
+                # the longest
+                member = copy.copy(om)
+                horizons = np.empty(n)
+                for i, value in enumerate(values):
+                    setattr(member, name, float(value))
+                    horizons[i] = member.adaptive_grid(min_samples=2, max_samples=2)[-1]
+                t = np.linspace(0, horizons.max(), max(min(self.sweep_samples, self.sweep_sample_budget // n), 3))
+            else:
+                t = om.t
+                horizons = np.full(n, t[-1])
+            batch = om.calculate_batch(t=t, **{name: values})
+            x = batch['x']
+        with self.profiler.span('render'):
+            (width, _), _ = view['sizes']
+            # min / max per column of every trace, at most one column per pixel
+            n_columns = int(np.clip(self.sweep_points // (2 * n), 1, width))
+            T, X = minmax_decimate_rows(t, x, n_columns)
+            # phase portrait: x and v of every trace evaluated over its own horizon (closed form), the shared grid
+            # would squeeze the fast traces into a few samples. sweep_points split by the horizon in units of the
+            # pole scale (as adaptive_grid), evaluated as one flat batch of (value, time) rows
+            if om.integrator_method() is None:
+                params = {'mass': om.mass, 'stiffness': om.stiffness, name: values}
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    scale = np.sqrt(params['stiffness'] / params['mass']) * np.maximum(1.0, 2 * batch['zeta'])
+                weights = 1.0 + np.nan_to_num(scale * horizons / (2 * np.pi), nan=0.0, posinf=0.0)
+                counts = np.maximum(self.sweep_points * weights / weights.sum(), 2).astype(int)
+                row = np.repeat(np.arange(n), counts)
+                first = np.repeat(np.cumsum(counts) - counts, counts)
+                t_phase = (np.arange(row.size) - first) / (counts[row] - 1) * horizons[row]
+                phase = om.calculate_batch(t=t_phase[:, None], derivatives=True, **{name: values[row]})
+                splits = np.cumsum(counts)[:-1]
+                P, V = np.split(phase['x'][:, 0], splits), np.split(phase['v'][:, 0], splits)
+            else:
+                # integrators solve on a shared grid: strided samples of x, v from central differences
+                idx = np.rint(np.linspace(0, t.size - 1, min(max(self.sweep_points // n, 2), t.size))).astype(int)
+                P, V = list(x[:, idx]), list(np.gradient(x, t, axis=1)[:, idx])
+            # fmin / fmax skip the nan rows of invalid parameter sets (nan only if everything is)
+            x_lim = padded_limits(np.fmin.reduce(x, axis=None), np.fmax.reduce(x, axis=None), rcParams['axes.ymargin'])
+            V_all = np.concatenate(V)
+            v_lim = padded_limits(np.fmin.reduce(V_all), np.fmax.reduce(V_all), rcParams['axes.ymargin'])
+            t_lim = padded_limits(t[0], t[-1], rcParams['axes.xmargin'])
+            images = []
+            for segments, lims, size in ((np.stack((T, X), axis=-1), (t_lim, x_lim), view['sizes'][0]),
+                                         ([np.column_stack(pv) for pv in zip(P, V)], (x_lim, v_lim), view['sizes'][1])):
+                if None in lims:
+                    images.append(None)
+                    continue
+                rgba = render_traces(segments, values, *lims, size, view['dpi'])
+                images.append((rgba, (*lims[0], *lims[1])))
+        return {'sweep': (name, values), 'images': images}
+
+    def apply_plot(self, results):
+        """newest finished result, on the Tk thread"""
+        if self.playback is not None:
+            # computed before Play, stop_playback requests a fresh one
+            return
+        if 'sweep' in results:
+            self.apply_sweep(results)
+            return
+        self.show_sweep(False)
+        x = results['t']
+        y = results['x']
+        # 更新线条数据
+        with self.profiler.span('set_data'):
+            self.line_lod.set_data(x, y)
+            stride = -(-y.size // self.phase_points)
+            self.phase_line.set_data(y[::stride], results['v'][::stride])
+        with self.profiler.span('autoscale'):
+            for ax in (self.ax, self.ax_phase):
+                ax.relim(visible_only=True)  # 重新计算坐标轴限制 (hidden sweep images excluded)
+                ax.autoscale_view()  # 自动缩放
+        self.overlay.update()
+        with self.profiler.span('draw'):
+            self.canvas.draw()  # 重绘
+        self.profiler.frame()
+
+    def apply_sweep(self, results):
+        name, values = results['sweep']
+        with self.profiler.span('set_data'):
+            self.sweep_mappable.set_clim(values.min(), values.max())
+            self.sweep_colorbar.set_label(name, fontsize=8)
+            self.show_sweep(True)
+            for image, rendered in zip(self.sweep_images, results['images']):
+                if rendered is None:
+                    image.set_visible(False)
+                    continue
+                rgba, extent = rendered
+                image.set_data(rgba)
+                # sets the axes limits to the extent the image was rendered for (autoscale stays on)
+                image.set_extent(extent)
+        self.overlay.update()
+        with self.profiler.span('draw'):
+            self.canvas.draw()
+        self.profiler.frame()
+
+    def show_sweep(self, visible):
+        for artist in (*self.sweep_images, self.sweep_cax):
+            artist.set_visible(visible)
+        for artist in (self.line, self.phase_line):
+            artist.set_visible(not visible)
+        if not visible:
+            # a hidden image would still pin autoscale to its edges
+            for image in self.sweep_images:
+                image.sticky_edges.x.clear()
+                image.sticky_edges.y.clear()
+
+    def fit_playback_axes(self):
+        x_max, v_max = self.playback.bounds()
+        self.ax.set_xlim(-self.playback_window, 0)
+        self.ax.set_ylim(-1.1 * x_max, 1.1 * x_max)
+        self.ax_phase.set_xlim(-1.1 * x_max, 1.1 * x_max)
+        self.ax_phase.set_ylim(-1.1 * v_max, 1.1 * v_max)
+        # full draw, recaptures the blit background
+        self.canvas.draw()
+
+    def reset_values(self):
+        """重置所有参数"""
+        for inp in self.inputs:
+            inp.set_value(1.0)
+        self.scheduler.request()
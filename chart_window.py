@@ -0,0 +1,272 @@
+import copy
+import time
+import tkinter as tk
+from tkinter.filedialog import asksaveasfilename
+import numpy as np
+from chart_plot import ChartPlot
+from redraw_scheduler import RedrawScheduler
+from compute_worker import ComputeWorker
+from blit_manager import BlitManager
+from playback import Playback
+import data_export
+from profiling import Profiler
+
+# Matplotlib 集成库
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+class InputGroup(tk.Frame):
+    # input group (Entry & Scale)
+    def __init__(self, parent, label_text, index, callback, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.callback = callback  # 数据变化时触发的回调函数（用于更新图表）
+        self.index = index
+
+        # 1. Label
+        tk.Label(self, text=label_text, font=("Arial", 10, "bold")).pack(anchor="w")
+
+        # 变量绑定
+        self.var = tk.DoubleVar(value=1.0)
+
+        # 2. Entry
+        self.entry = tk.Entry(self, textvariable=self.var, width=10)
+        self.entry.pack(side="left", padx=5)
+        self.entry.bind('<Return>', self.on_entry_change)  # 回车确认
+
+        # 3. Scale
+        self.scale = tk.Scale(self, variable=self.var, from_=0.1, to=10.0,
+                              orient="horizontal", resolution=0.1, command=self.on_scale_change)
+        self.scale.pack(side="left", fill="x", expand=True, padx=5)
+
+    def on_scale_change(self, event=None):
+        self.callback()
+
+    def on_entry_change(self, event=None):
+        self.callback()
+
+    def get_value(self):
+        return self.var.get()
+
+    def set_value(self, val):
+        self.var.set(val)
+
+
+class ChartWindow(ChartPlot, tk.Toplevel):
+    """
+    Oscillator page
+    row1 column1
+    """
+    max_fps = 30.0
+    # 实时回放帧率
+    playback_fps = 30.0
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Oscillator - Visualisation")
+        self.geometry("1200x900")
+        self.protocol("WM_DELETE_WINDOW", self.close_window)  # 绑定关闭事件
+
+        # F11: profiling + overlay on/off, F12: dump timings to profile.log
+        self.profiler = Profiler("ChartWindow")
+        self.bind("<F11>", self.toggle_profiling)
+        self.bind("<F12>", lambda event: print(f"Timings saved: {self.profiler.dump()}"))
+
+        # === 布局划分 ===
+
+        # bottom, control buttons
+        self.bottom_panel = tk.Frame(self, height=50, bg="#e0e0e0")
+        self.bottom_panel.pack(side="bottom", fill="x")
+
+        # main area
+        self.main_area = tk.Frame(self)
+        self.main_area.pack(fill="both", expand=True)
+
+        # left, graph settings
+        self.left_panel = tk.Frame(self.main_area, bg="#f0f0f0", width=300)
+        self.left_panel.pack(side="left", fill="y", padx=10, pady=10)
+        self.left_panel.pack_propagate(False)  # fixed width
+
+        # right, graph
+        self.right_panel = tk.Frame(self.main_area)
+        self.right_panel.pack(side="right", fill="both", expand=True, padx=10, pady=10)
+
+        # calculate 在后台线程运行, 只应用最新的结果
+        self.worker = ComputeWorker(self, self.apply_plot, on_busy=self.show_busy)
+
+        # slider / entry changes are coalesced into at most one redraw per frame
+        self.scheduler = RedrawScheduler(self, self.update_plot, self.max_fps)
+
+        # TODO five input groups for mass, stiffness, co, initial x and initial v
+        self.inputs = []
+        for i in range(5):
+            group = InputGroup(self.left_panel, f"Parameter {i + 1}", i, self.scheduler.request)
+            group.pack(fill="x", pady=10)
+            self.inputs.append(group)
+
+        # TODO one input text fot time.
+
+        # overlay: N values of one parameter, the others from the inputs above
+        sweep_frame = tk.LabelFrame(self.left_panel, text="Overlay")
+        sweep_frame.pack(fill="x", pady=10)
+        self.sweep_on = tk.BooleanVar(value=False)
+        tk.Checkbutton(sweep_frame, text="Sweep", variable=self.sweep_on, command=self.set_sweep).grid(
+            row=0, column=0, sticky="w")
+        self.sweep_param = tk.StringVar(value='damping_coefficient')
+        tk.OptionMenu(sweep_frame, self.sweep_param, *data_export.PARAM_LIST,
+                      command=lambda _: self.set_sweep()).grid(row=0, column=1, columnspan=3, sticky="ew")
+        self.sweep_from = tk.DoubleVar(value=0.1)
+        self.sweep_to = tk.DoubleVar(value=4.0)
+        for column, (text, var) in enumerate((("from", self.sweep_from), ("to", self.sweep_to))):
+            tk.Label(sweep_frame, text=text).grid(row=1, column=2 * column, sticky="e")
+            entry = tk.Entry(sweep_frame, textvariable=var, width=6)
+            entry.grid(row=1, column=2 * column + 1, sticky="w")
+            entry.bind('<Return>', lambda event: self.set_sweep())
+        self.sweep_count = tk.IntVar(value=20)
+        tk.Scale(sweep_frame, variable=self.sweep_count, from_=2, to=200, orient="horizontal", label="Traces",
+                 command=lambda _: self.set_sweep()).grid(row=2, column=0, columnspan=4, sticky="ew")
+
+        # graph
+        self.update_idletasks()
+        self.init_plot()
+
+        # control buttons
+        # left (Reset, Save, Input)
+        btn_style = {"width": 10, "pady": 5}
+        tk.Button(self.bottom_panel, text="Reset", command=self.reset_values, **btn_style).pack(side="left", padx=20,
+                                                                                                pady=10)
+        tk.Button(self.bottom_panel, text="Save", command=self.save_data, **btn_style).pack(side="left", padx=10,
+                                                                                            pady=10)
+        tk.Button(self.bottom_panel, text="Input", command=self.manual_input_trigger, **btn_style).pack(side="left",
+                                                                                                        padx=10,
+                                                                                                        pady=10)
+        self.play_button = tk.Button(self.bottom_panel, text="Play", command=self.toggle_playback, **btn_style)
+        self.play_button.pack(side="left", padx=10, pady=10)
+        # playback speed, simulated seconds per second
+        self.speed_var = tk.DoubleVar(value=1.0)
+        tk.Scale(self.bottom_panel, variable=self.speed_var, from_=0.1, to=10.0, resolution=0.1, orient="horizontal",
+                 label="Speed", command=self.set_playback_speed).pack(side="left", padx=10)
+        self._play_id = None
+        self.busy_label = tk.Label(self.bottom_panel, text="", bg="#e0e0e0")
+        self.busy_label.pack(side="left", padx=10)
+
+        # right (Close)
+        tk.Button(self.bottom_panel, text="Close", command=self.close_window, bg="#ffcccc", **btn_style).pack(
+            side="right", padx=20, pady=10)
+
+    def init_plot(self):
+        """初始化 Matplotlib 图表"""
+        # 1. 创建 Figure
+        self.build_figure()
+
+        # 2. 嵌入到 Tkinter
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.right_panel)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+
+        # 第一次绘制
+        self.update_plot()
+
+    def set_sweep(self):
+        if self.sweep_on.get():
+            values = np.linspace(self.sweep_from.get(), self.sweep_to.get(), int(self.sweep_count.get()))
+            self.sweep = (self.sweep_param.get(), values)
+        else:
+            self.sweep = None
+        self.scheduler.request()
+
+    def toggle_playback(self):
+        if self.playback is None:
+            self.start_playback()
+        else:
+            self.stop_playback()
+
+    def start_playback(self):
+        self.om.update_params([inp.get_value() for inp in self.inputs])
+        self.playback = Playback(self.om, self.playback_window, self.speed_var.get())
+        # a result still in flight would redraw the static plot over the blit background
+        self.worker.cancel()
+        play_artists = (self.play_line, self.play_phase, self.play_marker, self.play_text)
+        for artist in (self.line, self.phase_line, *self.sweep_images, self.sweep_cax):
+            artist.set_visible(False)
+        for artist in play_artists:
+            artist.set_visible(True)
+        # axes are fixed while playing (time relative to now), so the blit background stays valid
+        self.ax.set_xlabel("t - now (s)")
+        # the profiling overlay changes every frame too
+        self.bm = BlitManager(self.canvas, play_artists + (self.overlay.text,))
+        self.fit_playback_axes()
+        self.play_button.config(text="Stop")
+        self.play_tick()
+
+    def play_tick(self):
+        start = time.perf_counter()
+        with self.profiler.span('playback'):
+            t, x, v = self.playback.frame()
+            now = self.playback.sim_time
+            self.play_line.set_data(t - now, x)
+            self.play_phase.set_data(x, v)
+            self.play_marker.set_data(x[-1:], v[-1:])
+            self.play_text.set_text(f"t = {now:.2f} s")
+        self.overlay.update()
+        with self.profiler.span('draw'):
+            self.bm.update()
+        self.profiler.frame()
+        # fixed frame rate, the time spent on this frame is taken off the wait
+        delay = 1.0 / self.playback_fps - (time.perf_counter() - start)
+        self._play_id = self.after(max(int(delay * 1000), 1), self.play_tick)
+
+    def set_playback_speed(self, value=None):
+        if self.playback is not None:
+            self.playback.speed = self.speed_var.get()
+
+    def stop_playback(self):
+        if self._play_id is not None:
+            self.after_cancel(self._play_id)
+            self._play_id = None
+        self.bm.disconnect()
+        for artist in (self.play_line, self.play_phase, self.play_marker, self.play_text):
+            artist.set_visible(False)
+            artist.set_animated(False)
+        self.overlay.text.set_animated(False)
+        for artist in (self.line, self.phase_line):
+            artist.set_visible(True)
+        self.ax.set_xlabel("X Axis")
+        self.ax.autoscale(True)
+        self.ax_phase.autoscale(True)
+        self.playback = None
+        self.play_button.config(text="Play")
+        self.update_plot()
+
+    def save_data(self):
+        filename = asksaveasfilename(
+            parent=self,
+            defaultextension=".csv",
+            filetypes=[
+                ("CSV", "*.csv"),
+                ("NumPy binary", "*.npy"),
+                ("Parquet", "*.parquet"),
+            ],
+        )
+        if not filename:
+            return
+        # same grid as the plot, written chunk by chunk
+        t = self.om.adaptive_grid() if self.adaptive else self.t_grid
+        data_export.export(filename, copy.copy(self.om), t[0], t[-1], t.size)
+        print(f"Data Saved: {filename}")
+
+    def manual_input_trigger(self):
+        print("Input Button Clicked")  # 额外输入逻辑
+
+    def toggle_profiling(self, event=None):
+        self.profiler.enabled = not self.profiler.enabled
+        self.scheduler.request()
+
+    def show_busy(self, busy):
+        self.busy_label.config(text="Computing..." if busy else "")
+
+    def close_window(self):
+        if self._play_id is not None:
+            self.after_cancel(self._play_id)
+        self.scheduler.cancel()
+        self.worker.shutdown()
+        self.destroy()
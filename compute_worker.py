@@ -0,0 +1,109 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ComputeWorker:
+    """
+    runs computations off the Tk main thread.
+    every submit gets an increasing request id; pending older jobs are cancelled, results of older
+    jobs that finish late are dropped, and only the newest finished result is handed to on_result.
+    results travel through a queue polled with Tk after(), so on_result / on_busy run on the Tk thread.
+    on_busy(True) once requests have been outstanding for busy_threshold s without a break (e.g. a slider drag
+    that keeps submitting), on_busy(False) when the newest one is applied.
+    """
+
+    def __init__(self, widget, on_result, on_busy=None, busy_threshold: float = 0.2, poll_ms: int = 15,
+                 max_workers: int = 1):
+        self.widget = widget
+        self.on_result = on_result
+        self.on_busy = on_busy
+        self.busy_threshold = busy_threshold
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.latest_id = 0
+        self.applied_id = 0
+        self.discarded = 0
+        self.busy = False
+        self._futures = {}
+        self._done = queue.Queue()
+        # start of the current run of outstanding requests
+        self._outstanding_since = 0.0
+        self._poll_id = None
+
+    def submit(self, fn, *args):
+        """
+        :return: request id
+        """
+        for future in self._futures.values():
+            if future.cancel():
+                self.discarded += 1
+        if self.applied_id == self.latest_id:
+            self._outstanding_since = time.perf_counter()
+        self.latest_id += 1
+        request_id = self.latest_id
+        future = self.executor.submit(fn, *args)
+        # runs on the worker thread, only hands the future over
+        future.add_done_callback(lambda f, rid=request_id: self._done.put((rid, f)))
+        self._futures = {request_id: future}
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
+        return request_id
+
+    def _poll(self):
+        self._poll_id = None
+        newest = None
+        while True:
+            try:
+                request_id, future = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                continue
+            if newest is not None:
+                self.discarded += 1
+            if newest is None or request_id > newest[0]:
+                newest = (request_id, future)
+
+        if newest is not None:
+            request_id, future = newest
+            if request_id > self.applied_id:
+                self.applied_id = request_id
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Computation {request_id} failed: {e!r}")
+                else:
+                    self.on_result(result)
+            else:
+                self.discarded += 1
+
+        if self.applied_id < self.latest_id:
+            if time.perf_counter() - self._outstanding_since > self.busy_threshold:
+                self._set_busy(True)
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._set_busy(False)
+
+    def cancel(self):
+        """
+        drop every outstanding request: pending jobs are cancelled, running ones are discarded when they finish
+        """
+        for future in self._futures.values():
+            if future.cancel():
+                self.discarded += 1
+        self._futures = {}
+        self.applied_id = self.latest_id
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool):
+        if busy != self.busy:
+            self.busy = busy
+            if self.on_busy is not None:
+                self.on_busy(busy)
+
+    def shutdown(self):
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,220 @@
+import copy
+import json
+import os
+
+import numpy as np
+
+from integrator import harmonic_forcing, integrate_batch
+
+# samples per chunk, a chunk is the largest block ever held in memory
+CHUNK_SIZE = 1_000_000
+COLUMNS = ['t', 'x', 'envelope']
+CRIT_COLUMNS = ['kind', 't', 'x']
+# kind column of the critical point table
+CRIT_KINDS = {'zeros': 0, 'peaks': 1, 'valleys': 2}
+PARAM_LIST = ['mass', 'stiffness', 'damping_coefficient', 'x0', 'v0']
+
+
+def forcing_metadata(forcing):
+    """
+    None, {'harmonic': amplitude/frequency/phase} for integrator.harmonic_forcing, else {'callable': repr}
+    """
+    if forcing is None:
+        return None
+    harmonic = getattr(forcing, 'harmonic', None)
+    if harmonic is not None:
+        return {'harmonic': harmonic}
+    return {'callable': repr(forcing)}
+
+
+def grid_metadata(om, t_start: float, t_end: float, n: int):
+    """
+    everything needed to rebuild the export without the data: parameter set, model terms + solver, linspace grid
+    """
+    return {
+        'format_version': 2,
+        'params': {p: float(getattr(om, p)) for p in PARAM_LIST},
+        'model': {
+            'cubic_stiffness': float(om.cubic_stiffness),
+            'friction_force': float(om.friction_force),
+            'forcing': forcing_metadata(om.forcing),
+            'solver': om.solver,
+        },
+        'grid': {'t_start': float(t_start), 't_end': float(t_end), 'n': int(n)},
+        'columns': COLUMNS,
+        'crit_columns': CRIT_COLUMNS,
+        'crit_kinds': CRIT_KINDS,
+    }
+
+
+def restore_oscillator(metadata):
+    """
+    :return: OscillatorMath with the exported parameters, model terms, solver and its t grid.
+             format_version 1 files have no model (linear, 'auto')
+    """
+    from oscillator_math import OscillatorMath
+    om = OscillatorMath()
+    om.update_params([metadata['params'][p] for p in PARAM_LIST])
+    model = metadata.get('model')
+    if model is not None:
+        om.cubic_stiffness = model['cubic_stiffness']
+        om.friction_force = model['friction_force']
+        om.solver = model['solver']
+        forcing = model['forcing']
+        if forcing is not None:
+            if 'harmonic' not in forcing:
+                raise ValueError(f"Cannot restore forcing {forcing['callable']}, set om.forcing after restoring")
+            om.forcing = harmonic_forcing(**forcing['harmonic'])
+    grid = metadata['grid']
+    om.t = np.linspace(grid['t_start'], grid['t_end'], grid['n'])
+    return om
+
+
+def iter_chunks(om, t_start: float, t_end: float, n: int, chunk_size: int = CHUNK_SIZE):
+    """
+    compute np.linspace(t_start, t_end, n) chunk by chunk.
+    each chunk is evaluated one sample past its end, so critical points between two chunks are not lost.
+    integrators (no critical points, empty crit) continue every chunk from the state at the previous chunk's
+    last sample instead of integrating from t = 0 again
+    :return: generator of (block (m,3) of t/x/envelope, crit (k,3) of kind/t/x)
+    """
+    om = copy.copy(om)
+    method = om.integrator_method()
+    # integrator state (x, v) at time origin, starts at t = 0 with the rule of OscillatorMath.cal_integrated
+    origin = 0.0
+    unforced_rest = om.forcing is None and om.x0 == 0.0 and om.v0 == 0.0
+    state = (1.0 if unforced_rest else om.x0, om.v0)
+    dt = (t_end - t_start) / (n - 1) if n > 1 else 0.0
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        stop_ext = min(stop + 1, n)
+        t = t_start + np.arange(start, stop_ext) * dt
+        if stop_ext == n:
+            # same end point as linspace
+            t[-1] = t_end
+        m = stop - start
+        block = np.empty((m, 3))
+        block[:, 0] = t[:m]
+        if method is not None:
+            forcing = om.forcing
+            if forcing is not None and origin != 0.0:
+                # the integrator starts at 0, forcing runs on absolute time
+                forcing = (lambda f, shift: lambda s: f(s + shift))(om.forcing, origin)
+            solution = integrate_batch(om.mass, om.stiffness, om.damping_coefficient, *state, t - origin,
+                                       om.cubic_stiffness, om.friction_force, forcing, method)
+            # the extra sample is the next chunk's first
+            origin, state = t[-1], (solution['x'][0, -1], solution['v'][0, -1])
+            block[:, 1] = solution['x'][0, :m]
+            block[:, 2] = np.nan
+            yield block, np.empty((0, 3))
+            continue
+
+        om.t = t
+        results = om.calculate(all_crit_points=True)
+        block[:, 1] = results['x'][:m]
+        block[:, 2] = np.nan if results['envelope'] is None else results['envelope'][:m]
+
+        crit = []
+        for kind, code in CRIT_KINDS.items():
+            points = results['crit_points'][kind]
+            if stop_ext > stop:
+                points = points[points[:, 0] < t[-1]]
+            crit.append(np.column_stack((np.full(len(points), code), points)))
+        crit = np.concatenate(crit)
+        yield block, crit[np.argsort(crit[:, 1], kind='stable')]
+
+
+def crit_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_crit{ext}"
+
+
+def export_csv(path, om, t_start, t_end, n, chunk_size: int = CHUNK_SIZE):
+    """
+    path: t,x,envelope   path_crit: kind,t,x   metadata as a '# {json}' first line of both
+    """
+    header = '# ' + json.dumps(grid_metadata(om, t_start, t_end, n))
+    with open(path, 'w') as f, open(crit_path(path), 'w') as f_crit:
+        f.write(header + '\n' + ','.join(COLUMNS) + '\n')
+        f_crit.write(header + '\n' + ','.join(CRIT_COLUMNS) + '\n')
+        for block, crit in iter_chunks(om, t_start, t_end, n, chunk_size):
+            np.savetxt(f, block, delimiter=',', fmt='%.17g')
+            np.savetxt(f_crit, crit, delimiter=',', fmt=['%d', '%.17g', '%.17g'])
+
+
+def export_npy(path, om, t_start, t_end, n, chunk_size: int = CHUNK_SIZE):
+    """
+    path: (n,3) float64 .npy filled through a memory map   path_crit: (k,3)   metadata: path with .json
+    """
+    metadata = grid_metadata(om, t_start, t_end, n)
+    data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n, 3))
+    crit = []
+    start = 0
+    for block, crit_block in iter_chunks(om, t_start, t_end, n, chunk_size):
+        data[start:start + len(block)] = block
+        start += len(block)
+        crit.append(crit_block)
+    data.flush()
+    del data
+    np.save(crit_path(path), np.concatenate(crit))
+    with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def export_parquet(path, om, t_start, t_end, n, chunk_size: int = CHUNK_SIZE):
+    """
+    one row group per chunk, metadata stored in the parquet schema. needs pyarrow
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    metadata = {b'oscillator': json.dumps(grid_metadata(om, t_start, t_end, n)).encode()}
+    schema = pa.schema([(c, pa.float64()) for c in COLUMNS], metadata=metadata)
+    crit_schema = pa.schema([('kind', pa.int8()), ('t', pa.float64()), ('x', pa.float64())], metadata=metadata)
+    crit = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for block, crit_block in iter_chunks(om, t_start, t_end, n, chunk_size):
+            writer.write_table(pa.Table.from_pandas(pd.DataFrame(block, columns=COLUMNS), schema=schema,
+                                                    preserve_index=False))
+            crit.append(crit_block)
+    crit = np.concatenate(crit)
+    crit_frame = pd.DataFrame({'kind': crit[:, 0].astype(np.int8), 't': crit[:, 1], 'x': crit[:, 2]})
+    pq.write_table(pa.Table.from_pandas(crit_frame, schema=crit_schema, preserve_index=False), crit_path(path))
+
+
+EXPORTERS = {'.csv': export_csv, '.npy': export_npy, '.parquet': export_parquet}
+
+
+def export(path, om, t_start, t_end, n, chunk_size: int = CHUNK_SIZE):
+    """
+    export by file extension (.csv / .npy / .parquet)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {ext}")
+    EXPORTERS[ext](path, om, t_start, t_end, n, chunk_size)
+
+
+def load_export(path):
+    """
+    :return: metadata, data (t/x/envelope), crit (kind/t/x). npy data is memory-mapped
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        import pandas as pd
+        with open(path) as f:
+            metadata = json.loads(f.readline()[1:])
+        data = pd.read_csv(path, skiprows=1, float_precision='round_trip')
+        crit = pd.read_csv(crit_path(path), skiprows=1, float_precision='round_trip')
+        return metadata, data, crit
+    if ext == '.npy':
+        with open(os.path.splitext(path)[0] + '.json') as f:
+            metadata = json.load(f)
+        return metadata, np.load(path, mmap_mode='r'), np.load(crit_path(path))
+    if ext == '.parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata[b'oscillator'])
+        return metadata, table.to_pandas(), pq.read_table(crit_path(path)).to_pandas()
+    raise ValueError(f"Unsupported export format: {ext}")
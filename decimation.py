@@ -0,0 +1,95 @@
+import numpy as np
+
+
+def minmax_decimate(t, y, n_columns: int):
+    """
+    reduce a trace to the min and max sample of each of n_columns equal index bins, kept in time order,
+    so peaks and zero crossings survive at screen resolution. the first and last samples are always kept.
+    :return: t, y (unchanged if there are fewer than 2 samples per column)
+    """
+    n = t.size
+    n_columns = max(int(n_columns), 1)
+    if n <= 2 * n_columns:
+        return t, y
+    per = -(-n // n_columns)
+    m = (n // per) * per
+    rows = y[:m].reshape(-1, per)
+    i_min = rows.argmin(axis=1)
+    i_max = rows.argmax(axis=1)
+    base = np.arange(rows.shape[0]) * per
+    idx = [[0], np.column_stack((base + np.minimum(i_min, i_max), base + np.maximum(i_min, i_max))).ravel()]
+    if m < n:
+        tail = y[m:]
+        idx.append(np.sort([m + tail.argmin(), m + tail.argmax()]))
+    idx.append([n - 1])
+    idx = np.unique(np.concatenate(idx))
+    return t[idx], y[idx]
+
+
+def minmax_decimate_rows(t, y, n_columns: int):
+    """
+    minmax_decimate of every row of y over the shared grid t in one pass.
+    all rows keep the same number of samples (at their own min / max positions), so the result stacks
+    into LineCollection segments directly
+    :return: t, y (n_rows, n_kept)
+    """
+    n_rows, n = y.shape
+    n_columns = max(int(n_columns), 1)
+    if n <= 2 * n_columns:
+        return np.broadcast_to(t, y.shape), y
+    per = -(-n // n_columns)
+    m = (n // per) * per
+    bins = y[:, :m].reshape(n_rows, -1, per)
+    i_min = bins.argmin(axis=2)
+    i_max = bins.argmax(axis=2)
+    base = np.arange(bins.shape[1]) * per
+    idx = [np.zeros((n_rows, 1), dtype=int),
+           np.stack((base + np.minimum(i_min, i_max), base + np.maximum(i_min, i_max)), axis=2).reshape(n_rows, -1)]
+    if m < n:
+        tail = y[:, m:]
+        a, b = m + tail.argmin(axis=1), m + tail.argmax(axis=1)
+        idx.append(np.column_stack((np.minimum(a, b), np.maximum(a, b))))
+    idx.append(np.full((n_rows, 1), n - 1))
+    idx = np.concatenate(idx, axis=1)
+    return t[idx], np.take_along_axis(y, idx, axis=1)
+
+
+class DecimatedLine:
+    """
+    level-of-detail wrapper around a Line2D.
+    the full resolution trace stays in .t / .y (for export and feature extraction), the line only
+    gets a min/max envelope per pixel column of the visible x range, recomputed on resize and zoom.
+    t must be increasing.
+    """
+
+    def __init__(self, line):
+        self.line = line
+        self.ax = line.axes
+        self.t = np.empty(0)
+        self.y = np.empty(0)
+        self.cid_xlim = self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.cid_resize = self.ax.figure.canvas.mpl_connect('resize_event', self.on_resize)
+
+    def set_data(self, t, y):
+        self.t = np.asarray(t)
+        self.y = np.asarray(y)
+        # whole trace, so that relim / autoscale_view see the full extent
+        self.line.set_data(*minmax_decimate(self.t, self.y, self.ax.bbox.width))
+
+    def refresh(self):
+        """
+        re-decimate for the current view
+        """
+        if self.t.size == 0:
+            return
+        x_min, x_max = sorted(self.ax.get_xlim())
+        # one extra sample on each side keeps the line running to the axes edge
+        start = max(np.searchsorted(self.t, x_min) - 1, 0)
+        stop = np.searchsorted(self.t, x_max, side='right') + 1
+        self.line.set_data(*minmax_decimate(self.t[start:stop], self.y[start:stop], self.ax.bbox.width))
+
+    def on_xlim_changed(self, ax):
+        self.refresh()
+
+    def on_resize(self, event):
+        self.refresh()
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from oscillator_math import classify_regime, UNDERDAMPED, CRITICALLY_DAMPED, OVERDAMPED
+
+# 特征值: second order system characteristics, step-response definitions
+SETTLING_BAND = 0.02
+RISE_LOW, RISE_HIGH = 0.1, 0.9
+
+
+def step_underdamped(zeta, w_n, t):
+    s = np.sqrt(1 - zeta ** 2)
+    return 1 - np.exp(-zeta * w_n * t) * (np.cos(w_n * s * t) + zeta / s * np.sin(w_n * s * t))
+
+
+def step_critically_damped(zeta, w_n, t):
+    return 1 - np.exp(-w_n * t) * (1 + w_n * t)
+
+
+def step_overdamped(zeta, w_n, t):
+    r1 = -w_n * (zeta - np.sqrt(zeta ** 2 - 1))
+    r2 = -w_n * (zeta + np.sqrt(zeta ** 2 - 1))
+    return 1 - (r2 * np.exp(r1 * t) - r1 * np.exp(r2 * t)) / (r2 - r1)
+
+
+STEP_RESPONSES = {UNDERDAMPED: step_underdamped, CRITICALLY_DAMPED: step_critically_damped,
+                  OVERDAMPED: step_overdamped}
+
+
+def step_response(zeta, w_n, t):
+    """
+    unit step response of m*x''+c*x'+k*x = k, elementwise over broadcast arrays
+    """
+    zeta, w_n, t = np.broadcast_arrays(zeta, w_n, t)
+    regime = classify_regime(zeta)
+    y = np.full(zeta.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for code, response in STEP_RESPONSES.items():
+            rows = regime == code
+            y[rows] = response(zeta[rows], w_n[rows], t[rows])
+    return y
+
+
+def solve_increasing(zeta, w_n, target, lo, hi, iterations: int = 50):
+    """
+    vectorized bisection for step_response(t) = target on [lo, hi] where the response is increasing.
+    rows are grouped by regime once, hi is doubled first where it does not bracket the target yet.
+    """
+    zeta, w_n, target, lo, hi = (np.array(p, dtype=float) for p in np.broadcast_arrays(zeta, w_n, target, lo, hi))
+    regime = classify_regime(zeta)
+    result = np.full(zeta.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for code, response in STEP_RESPONSES.items():
+            rows = regime == code
+            z, w, y, a, b = zeta[rows], w_n[rows], target[rows], lo[rows], hi[rows]
+            for _ in range(64):
+                low = response(z, w, b) < y
+                if not low.any():
+                    break
+                a[low] = b[low]
+                b[low] *= 2
+            for _ in range(iterations):
+                mid = 0.5 * (a + b)
+                below = response(z, w, mid) < y
+                a = np.where(below, mid, a)
+                b = np.where(below, b, mid)
+            result[rows] = 0.5 * (a + b)
+    return result
+
+
+def overshoot(zeta):
+    """
+    maximum overshoot of the step response as a fraction of the final value, 0 when not oscillating
+    """
+    zeta = np.asarray(zeta, dtype=float)
+    regime = classify_regime(zeta)
+    under = regime == UNDERDAMPED
+    result = np.zeros(zeta.shape)
+    result[under] = np.exp(-np.pi * zeta[under] / np.sqrt(1 - zeta[under] ** 2))
+    result[regime < 0] = np.nan
+    return result
+
+
+def settling_time(zeta, w_n, iterations: int = 50):
+    """
+    time after which the step response stays inside the SETTLING_BAND.
+    underdamped: the error -e^(-zeta*w_n*t)/s * cos(w_d*t - asin(zeta)) peaks at t_j = j*pi/w_d with
+    |error| = e^(-zeta*w_n*t_j); the last peak above the band is found in closed form and the exit is bisected
+    between it and the next zero crossing, where |error| decreases. otherwise bisection on the increasing response
+    """
+    zeta, w_n = (np.asarray(p, dtype=float) for p in np.broadcast_arrays(zeta, w_n))
+    regime = classify_regime(zeta)
+    # undamped (or negative damping): never settles
+    under = (regime == UNDERDAMPED) & (zeta > 0)
+    result = np.full(zeta.shape, np.nan)
+    result[(regime == UNDERDAMPED) & ~under] = np.inf
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        z, w = zeta[under], w_n[under]
+        s = np.sqrt(1 - z ** 2)
+        w_d = w * s
+        # last peak j with e^(-zeta*w_n*j*pi/w_d) > band (j = 0 is the start, |error| = 1)
+        j = np.floor(-np.log(SETTLING_BAND) * s / (np.pi * z))
+        a = j * np.pi / w_d
+        b = (j * np.pi + np.pi / 2 + np.arcsin(z)) / w_d
+        for _ in range(iterations):
+            mid = 0.5 * (a + b)
+            outside = np.abs(step_underdamped(z, w, mid) - 1) > SETTLING_BAND
+            a = np.where(outside, mid, a)
+            b = np.where(outside, b, mid)
+        result[under] = 0.5 * (a + b)
+    slow = (regime >= 0) & (regime != UNDERDAMPED)
+    result[slow] = solve_increasing(zeta[slow], w_n[slow], 1 - SETTLING_BAND, 0.0, 1.0 / w_n[slow])
+    return result
+
+
+def extract_features(mass, stiffness, damping_coefficient):
+    """
+    characteristic values for whole arrays of parameter sets at once.
+    closed forms where they exist (underdamped overshoot/peak time), vectorized bisection on the closed-form
+    step response otherwise (rise time, settling time).
+    :return: DataFrame, one row per parameter set
+    """
+    m, k, c = (np.atleast_1d(np.asarray(p, dtype=float)) for p in np.broadcast_arrays(mass, stiffness,
+                                                                                     damping_coefficient))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zeta = c / (2 * np.sqrt(k * m))
+        w_n = np.sqrt(k / m)
+    regime = classify_regime(zeta)
+    under = regime == UNDERDAMPED
+    n = zeta.size
+
+    w_d = np.full(n, np.nan)
+    log_decrement = np.full(n, np.nan)
+    peak_time = np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.sqrt(1 - zeta[under] ** 2)
+        w_d[under] = w_n[under] * s
+        log_decrement[under] = 2 * np.pi * zeta[under] / s
+        peak_time[under] = np.pi / w_d[under]
+        q_factor = 1 / (2 * zeta)
+
+    # rise time: the response increases monotonically up to the first peak (or forever when not oscillating)
+    valid = regime >= 0
+    start = np.where(under, 0.0, 1.0 / w_n)
+    hi = np.where(under, peak_time, start)
+    rise_time = np.full(n, np.nan)
+    # both crossings in one bisection
+    z, w, h = (np.tile(p[valid], 2) for p in (zeta, w_n, hi))
+    target = np.repeat([RISE_LOW, RISE_HIGH], valid.sum())
+    t_low, t_high = np.split(solve_increasing(z, w, target, np.zeros_like(z), h), 2)
+    rise_time[valid] = t_high - t_low
+
+    return pd.DataFrame({
+        'mass': m,
+        'stiffness': k,
+        'damping_coefficient': c,
+        'regime': regime,
+        'zeta': zeta,
+        'w_n': w_n,
+        'w_d': w_d,
+        'f_n': w_n / (2 * np.pi),
+        'f_d': w_d / (2 * np.pi),
+        'log_decrement': log_decrement,
+        'q_factor': q_factor,
+        'overshoot': overshoot(zeta),
+        'peak_time': peak_time,
+        'rise_time': rise_time,
+        'settling_time': settling_time(zeta, w_n),
+    })
@@ -0,0 +1,159 @@
+"""
+frequency domain of m*x'' + c*x' + k*x = f(t).
+receptance H(jw) = 1 / (k - m*w^2 + j*c*w) in closed form over batches of parameter sets, and amplitude spectra
+of computed traces (real-input FFT, window functions cached per length; scipy.fft keeps its own plan cache).
+resonance() takes the peak and the half-power bandwidth from the same (n_rows, n_w) arrays, so it applies to a
+transfer function and to a spectrum alike.
+"""
+import functools
+
+import numpy as np
+import scipy.fft
+
+HALF_POWER = 1 / np.sqrt(2)
+WINDOWS = {'rect': np.ones, 'hann': np.hanning, 'hamming': np.hamming, 'blackman': np.blackman}
+# points added around every resonance by frequency_grid, over w_n * (1 +- RESONANCE_SPAN * zeta)
+RESONANCE_POINTS = 64
+RESONANCE_SPAN = 4.0
+
+
+def frequency_grid(mass, stiffness, damping_coefficient=None, n: int = 1000, decades: float = 3.0):
+    """
+    log grid over `decades` centred on the natural frequencies (rad/s).
+    with damping, RESONANCE_POINTS linear points are merged in around every resonance (zeta < 1/sqrt(2)),
+    so a sharp peak and its bandwidth are resolved whatever its width
+    """
+    c = 0.0 if damping_coefficient is None else damping_coefficient
+    m, k, c = (np.atleast_1d(np.asarray(p, dtype=float)) for p in np.broadcast_arrays(mass, stiffness, c))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w_n = np.sqrt(k / m)
+    w_n = w_n[np.isfinite(w_n) & (w_n > 0)]
+    if not w_n.size:
+        w_n = np.ones(1)
+    grid = np.logspace(np.log10(w_n.min()) - decades / 2, np.log10(w_n.max()) + decades / 2, n)
+    if damping_coefficient is None:
+        return grid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zeta = c / (2 * np.sqrt(k * m))
+        w = np.sqrt(k / m)
+    peaked = (zeta < HALF_POWER) & (w > 0) & np.isfinite(w)
+    if not peaked.any():
+        return grid
+    span = np.minimum(RESONANCE_SPAN * np.maximum(zeta[peaked], 1e-6), 0.9)
+    offsets = np.linspace(-1.0, 1.0, RESONANCE_POINTS)
+    dense = (w[peaked, None] * (1 + span[:, None] * offsets)).ravel()
+    return np.unique(np.concatenate((grid, dense[(dense > grid[0]) & (dense < grid[-1])])))
+
+
+def resonance(w, magnitude):
+    """
+    peak and half-power (-3 dB) bandwidth of every row of magnitude over the increasing grid w.
+    the peak is refined by a parabola through its three samples (log w, log magnitude), the half-power
+    frequencies are interpolated the same way. rows whose maximum is at the grid edge have no resonance (nan)
+    :return: dict{'peak_w', 'peak_magnitude', 'w_low', 'w_high', 'bandwidth', 'q_factor'}, (n_rows,) each
+    """
+    w = np.asarray(w, dtype=float)
+    mag = np.atleast_2d(magnitude)
+    n_rows, n = mag.shape
+    rows = np.arange(n_rows)
+    lw = np.log(w)
+    with np.errstate(divide='ignore'):
+        ly = np.log(mag)
+    i = np.argmax(mag, axis=1)
+    interior = (i > 0) & (i < n - 1)
+    ic = np.clip(i, 1, n - 2)
+
+    # parabola through (lw, ly) at ic-1, ic, ic+1
+    x0, x2 = lw[ic - 1] - lw[ic], lw[ic + 1] - lw[ic]
+    y0, y1, y2 = ly[rows, ic - 1], ly[rows, ic], ly[rows, ic + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2 = (y0 - y1) / x0, (y2 - y1) / x2
+        curvature = (d2 - d1) / (x2 - x0)
+        slope = d1 - curvature * x0
+        shift = np.clip(-slope / (2 * curvature), x0, x2)
+    shift = np.where(np.isfinite(shift) & (curvature < 0), shift, 0.0)
+    peak_w = np.exp(lw[ic] + shift)
+    peak_ly = y1 + slope * shift + curvature * shift ** 2
+    peak_ly = np.where(np.isfinite(peak_ly), np.maximum(peak_ly, y1), y1)
+
+    # last sample below half power left of the peak, first one right of it
+    level = peak_ly + np.log(HALF_POWER)
+    below = ly < level[:, None]
+    idx = np.arange(n)
+    left = below & (idx < i[:, None])
+    right = below & (idx > i[:, None])
+    has_left, has_right = left.any(axis=1), right.any(axis=1)
+    jl = np.where(has_left, n - 1 - np.argmax(left[:, ::-1], axis=1), 0)
+    jr = np.where(has_right, np.argmax(right, axis=1), n - 1)
+
+    def crossing(a, b):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = (level - ly[rows, a]) / (ly[rows, b] - ly[rows, a])
+        return np.exp(lw[a] + np.clip(frac, 0.0, 1.0) * (lw[b] - lw[a]))
+
+    found = interior & has_left & has_right
+    w_low = np.where(found, crossing(jl, np.minimum(jl + 1, n - 1)), np.nan)
+    w_high = np.where(found, crossing(np.maximum(jr - 1, 0), jr), np.nan)
+    bandwidth = w_high - w_low
+    return {
+        'peak_w': np.where(interior, peak_w, np.nan),
+        'peak_magnitude': np.where(interior, np.exp(peak_ly), np.nan),
+        'w_low': w_low,
+        'w_high': w_high,
+        'bandwidth': bandwidth,
+        'q_factor': np.where(found, peak_w / bandwidth, np.nan),
+    }
+
+
+def frequency_response(mass, stiffness, damping_coefficient, w):
+    """
+    receptance of every parameter set (scalars or 1-D arrays, broadcast) on the grid w (rad/s)
+    :return: dict{'w', 'H' complex, 'magnitude', 'magnitude_db', 'phase' (deg, 0 .. -180)}, (n_params, n_w),
+             plus the resonance() entries (n_params,)
+    """
+    m, k, c = (np.atleast_1d(np.asarray(p, dtype=float))[:, None] for p in
+               np.broadcast_arrays(mass, stiffness, damping_coefficient))
+    w = np.asarray(w, dtype=float)
+    real = k - m * w ** 2
+    imag = c * w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H = 1 / (real + 1j * imag)
+        magnitude = 1 / np.hypot(real, imag)
+        magnitude_db = 20 * np.log10(magnitude)
+    phase = -np.degrees(np.arctan2(imag, real))
+    return {'w': w, 'H': H, 'magnitude': magnitude, 'magnitude_db': magnitude_db, 'phase': phase,
+            **resonance(w, magnitude)}
+
+
+@functools.lru_cache(maxsize=32)
+def window_function(name: str, n: int):
+    """
+    :return: read-only window of length n and its coherent gain (sum), cached per (name, n)
+    """
+    if name not in WINDOWS:
+        raise ValueError(f"Unknown window: {name}, expected one of {', '.join(WINDOWS)}")
+    window = WINDOWS[name](n).astype(float)
+    window.setflags(write=False)
+    return window, window.sum()
+
+
+def spectrum(x, dt: float, window: str = 'hann', n_fft: int | None = None):
+    """
+    one-sided amplitude spectrum of every row of x, sampled every dt.
+    scaled by the window's coherent gain, a sinusoid of amplitude A on a bin shows as A.
+    n_fft: zero-padded length, default the next fast FFT size >= n
+    :return: dict{'w' (n_bins,) rad/s, 'amplitude' (n_rows, n_bins)}, plus the resonance() entries (n_rows,)
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    n = x.shape[-1]
+    n_fft = scipy.fft.next_fast_len(n, real=True) if n_fft is None else n_fft
+    win, gain = window_function(window, n)
+    amplitude = np.abs(scipy.fft.rfft(x * win, n=n_fft, axis=-1, workers=-1))
+    amplitude *= 2 / gain
+    # DC (and Nyquist) bins have no mirrored half
+    amplitude[:, 0] /= 2
+    if n_fft % 2 == 0:
+        amplitude[:, -1] /= 2
+    w = 2 * np.pi * scipy.fft.rfftfreq(n_fft, dt)
+    # the DC bin is not a resonance
+    return {'w': w, 'amplitude': amplitude, **resonance(w[1:], amplitude[:, 1:])}
@@ -0,0 +1,146 @@
+import copy
+import tkinter as tk
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from chart_window import InputGroup
+from compute_worker import ComputeWorker
+from frequency_response import WINDOWS, frequency_grid, frequency_response, spectrum
+from oscillator_math import OscillatorMath, uniform_step
+from redraw_scheduler import RedrawScheduler
+
+PARAM_LABELS = ['Mass', 'Stiffness', 'Damping coefficient']
+
+
+class FrequencyWindow(tk.Toplevel):
+    """
+    frequency domain view: Bode magnitude / phase of the receptance 1/(k - m*w^2 + j*c*w) in closed form,
+    and the FFT amplitude spectrum of the free response (calculate on the adaptive grid, x0 = 1).
+    resonance peak, half-power bandwidth and Q are marked on both.
+    """
+    om = OscillatorMath()
+    max_fps = 30.0
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Frequency Response")
+        self.geometry("1100x850")
+        self.protocol("WM_DELETE_WINDOW", self.close_window)
+
+        self.left_panel = tk.Frame(self, bg="#f0f0f0", width=260)
+        self.left_panel.pack(side="left", fill="y", padx=10, pady=10)
+        self.left_panel.pack_propagate(False)
+        self.right_panel = tk.Frame(self)
+        self.right_panel.pack(side="right", fill="both", expand=True, padx=10, pady=10)
+
+        self.worker = ComputeWorker(self, self.apply_plot)
+        self.scheduler = RedrawScheduler(self, self.update_plot, self.max_fps)
+
+        self.inputs = []
+        for i, label in enumerate(PARAM_LABELS):
+            group = InputGroup(self.left_panel, label, i, self.scheduler.request)
+            group.pack(fill="x", pady=10)
+            self.inputs.append(group)
+        tk.Label(self.left_panel, text="FFT window", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.window_name = tk.StringVar(value='rect')
+        tk.OptionMenu(self.left_panel, self.window_name, *WINDOWS, command=lambda _: self.scheduler.request()).pack(
+            fill="x", pady=5)
+        self.status = tk.Label(self.left_panel, text="", bg="#f0f0f0", justify="left", font=("Courier", 9))
+        self.status.pack(anchor="w", pady=10)
+        tk.Button(self.left_panel, text="Close", command=self.close_window, bg="#ffcccc").pack(side="bottom",
+                                                                                               fill="x", pady=10)
+
+        self.build_figure()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.right_panel)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.update_plot()
+
+    def build_figure(self, figsize=(7, 7)):
+        self.fig = Figure(figsize=figsize, dpi=100)
+        self.ax_mag, self.ax_phase, self.ax_spec = self.fig.subplots(3, 1, gridspec_kw={'height_ratios': [3, 2, 3]})
+        self.ax_mag.set_ylabel("|H| (dB)")
+        self.ax_mag.set_xscale('log')
+        self.ax_phase.set_ylabel("Phase (deg)")
+        self.ax_phase.set_xscale('log')
+        self.ax_phase.set_ylim(-190, 10)
+        self.ax_phase.set_yticks([0, -90, -180])
+        self.ax_phase.sharex(self.ax_mag)
+        self.ax_spec.set_xlabel("Frequency (rad/s)")
+        self.ax_spec.set_ylabel("Spectrum |X|")
+        self.ax_spec.set_xscale('log')
+        self.ax_spec.set_yscale('log')
+        self.mag_line, = self.ax_mag.plot([], [], 'b-')
+        self.phase_line, = self.ax_phase.plot([], [], 'b-')
+        self.spec_line, = self.ax_spec.plot([], [], 'g-', linewidth=1)
+        # peak and half-power band
+        self.mag_peak, = self.ax_mag.plot([], [], 'ro')
+        self.mag_band = self.ax_mag.axvspan(1.0, 1.0, color='tab:red', alpha=0.15, visible=False)
+        self.spec_peak, = self.ax_spec.plot([], [], 'ro')
+        self.spec_band = self.ax_spec.axvspan(1.0, 1.0, color='tab:red', alpha=0.15, visible=False)
+        self.fig.tight_layout()
+
+    def update_plot(self):
+        params = [inp.get_value() for inp in self.inputs]
+        # mass / stiffness must stay positive, damping non-negative
+        params = [max(params[0], 1e-6), max(params[1], 1e-6), max(params[2], 0.0)]
+        self.om.update_params(params + [1.0, 0.0])
+        self.worker.submit(self.compute, copy.copy(self.om), self.window_name.get())
+
+    def compute(self, om, window):
+        """runs on the worker thread"""
+        w = frequency_grid(om.mass, om.stiffness, om.damping_coefficient)
+        bode = frequency_response(om.mass, om.stiffness, om.damping_coefficient, w)
+        results = om.calculate(adaptive=True)
+        t, x = results['t'], results['x']
+        dt = uniform_step(t)
+        spec = spectrum(x, dt, window) if dt is not None else None
+        return bode, spec
+
+    def apply_plot(self, result):
+        bode, spec = result
+        w = bode['w']
+        self.mag_line.set_data(w, bode['magnitude_db'][0])
+        self.phase_line.set_data(w, bode['phase'][0])
+        lines = ["Bode"] + self.describe(bode, self.mag_peak, self.mag_band, to_y=lambda m: 20 * np.log10(m))
+        if spec is not None:
+            # the DC bin cannot go on a log axis
+            self.spec_line.set_data(spec['w'][1:], spec['amplitude'][0, 1:])
+            lines += ["", "Spectrum"] + self.describe(spec, self.spec_peak, self.spec_band, to_y=lambda m: m)
+        else:
+            # non-uniform grid, no FFT: clear the previous spectrum
+            self.spec_line.set_data([], [])
+            self.spec_peak.set_data([], [])
+            self.spec_band.set_visible(False)
+            lines += ["", "Spectrum", "non-uniform grid"]
+        for ax in (self.ax_mag, self.ax_spec):
+            ax.relim()
+            ax.autoscale_view()
+        self.status.config(text="\n".join(lines))
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def describe(result, marker, band, to_y):
+        """move the peak marker / half-power band, :return: status lines"""
+        peak_w = result['peak_w'][0]
+        if not np.isfinite(peak_w):
+            marker.set_data([], [])
+            band.set_visible(False)
+            return ["no resonance peak"]
+        marker.set_data([peak_w], [to_y(result['peak_magnitude'][0])])
+        w_low, w_high = result['w_low'][0], result['w_high'][0]
+        if np.isfinite(w_low) and np.isfinite(w_high):
+            band.set_x(w_low)
+            band.set_width(w_high - w_low)
+            band.set_visible(True)
+        else:
+            band.set_visible(False)
+        return [f"peak  {peak_w:10.4g} rad/s",
+                f"level {result['peak_magnitude'][0]:10.4g}",
+                f"BW    {result['bandwidth'][0]:10.4g} rad/s",
+                f"Q     {result['q_factor'][0]:10.4g}"]
+
+    def close_window(self):
+        self.scheduler.cancel()
+        self.worker.shutdown()
+        self.destroy()
@@ -0,0 +1,266 @@
+"""
+parameter identification: stiffness / damping_coefficient / x0 / v0 from measured displacement traces.
+a free response only determines k/m and c/m, the mass is given (default 1) and the others scale with it.
+
+    python identification.py rig_a.csv rig_b.npy --mass 2.5 --output fits.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_export import CHUNK_SIZE
+
+# multi-start factors, from the dominant angular frequency w0 and the decay rate a of the record:
+# oscillating starts sigma = f * a, q = f * w0^2; overdamped starts with slow pole a and fast pole f * a
+SIGMA_STARTS = (0.5, 1.0, 2.0)
+Q_STARTS = (0.7, 1.0, 1.4)
+FAST_POLE_STARTS = (2.0, 4.0, 8.0)
+# the decay rate is read where |x| last exceeds this fraction of its maximum
+DECAY_LEVEL = 0.05
+# Jacobian bytes per fit batch
+BATCH_BYTES = 256 * 2 ** 20
+
+
+def load_trace(path, max_samples: int | None = None, chunk_size: int = CHUNK_SIZE):
+    """
+    t, x of a measured trace, read chunk by chunk and thinned to at most max_samples by a fixed stride.
+    .csv: columns t, x (a '# {json}' first line as written by data_export is skipped)
+    .npy: (n, >=2) array, columns t, x, memory-mapped
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        data = np.load(path, mmap_mode='r')
+        n = len(data)
+        stride = 1 if max_samples is None else max(-(-n // max_samples), 1)
+        parts = [np.array(data[start:start + chunk_size:stride, :2])
+                 for start in range(0, n, -(-chunk_size // stride) * stride)]
+        block = np.concatenate(parts) if parts else np.empty((0, 2))
+        return block[:, 0], block[:, 1]
+    if ext == '.csv':
+        with open(path) as f:
+            skip = 1 if f.readline().startswith('#') else 0
+            n = sum(1 for _ in f) - skip
+        stride = 1 if max_samples is None else max(-(-n // max_samples), 1)
+        parts = []
+        offset = 0
+        for chunk in pd.read_csv(path, skiprows=skip, usecols=['t', 'x'], chunksize=chunk_size,
+                                 float_precision='round_trip'):
+            values = chunk[['t', 'x']].to_numpy()
+            # global row index multiple of stride
+            parts.append(values[(-offset) % stride::stride])
+            offset += len(values)
+        block = np.concatenate(parts) if parts else np.empty((0, 2))
+        return block[:, 0], block[:, 1]
+    raise ValueError(f"Unsupported trace format: {ext}")
+
+
+def model(theta, t):
+    """
+    x(t) = e^(-sigma*t) * (x0*C + (v0 + sigma*x0)*S) and its Jacobian, theta = (sigma, q, x0, v0) rows.
+    q = w_d^2: C = cos(w_d*t), S = sin(w_d*t)/w_d for q > 0, cosh / sinh for q < 0 (overdamped), C = 1, S = t at
+    q = 0, so one parameterisation covers every regime and the derivatives reuse the decay / cos / sin terms:
+        dC/dq = -t*S/2    dS/dq = (t*C - S) / (2q)   (-t^3/6 near q = 0)
+    :return: x (n_fits, n_t), J (n_fits, 4, n_t)
+    """
+    sigma, q, x0, v0 = (theta[:, i, None] for i in range(4))
+    n_fits = len(theta)
+    C = np.empty((n_fits, t.size))
+    S = np.empty((n_fits, t.size))
+    w = np.sqrt(np.abs(q))
+    # one branch per row, q is constant along a row
+    under = q[:, 0] > 0
+    small = np.abs(q[:, 0]) * t[-1] ** 2 < 1e-6
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for rows, cos, sin in ((under & ~small, np.cos, np.sin), (~under & ~small, np.cosh, np.sinh)):
+            if rows.any():
+                wt = w[rows] * t
+                C[rows] = cos(wt)
+                S[rows] = sin(wt) / w[rows]
+        # C = 1 - q*t^2/2, S = t - q*t^3/6 near q = 0
+        C[small] = 1 - q[small] * t ** 2 / 2
+        S[small] = t - q[small] * t ** 3 / 6
+        dS = (t * C - S) / (2 * q)
+        dS[small] = -t ** 3 / 6 + q[small] * t ** 5 / 60
+        decay = np.exp(-sigma * t)
+        B = v0 + sigma * x0
+        J = np.empty((n_fits, 4, t.size))
+        # J[:, 3] = e^(-sigma*t)*S, the other columns are built from it
+        eS = np.multiply(decay, S, out=J[:, 3])
+        eC = decay * C
+        x = x0 * eC + B * eS
+        J[:, 0] = x0 * eS - t * x
+        J[:, 1] = B * decay * dS - x0 * t * eS / 2
+        J[:, 2] = eC + sigma * eS
+    return x, J
+
+
+def initial_guesses(t, X):
+    """
+    multi-start table per trace from the dominant frequency of the spectrum
+    :return: (n_traces * n_starts, 4) theta, trace index per row
+    """
+    n_traces, n = X.shape
+    dt = (t[-1] - t[0]) / (n - 1)
+    spectrum = np.abs(np.fft.rfft(X - X.mean(axis=1, keepdims=True), axis=1))
+    spectrum[:, 0] = 0
+    freqs = np.fft.rfftfreq(n, dt)
+    w0 = 2 * np.pi * freqs[spectrum.argmax(axis=1)]
+    # no oscillation inside the record: a few radians over its length
+    w0 = np.where(w0 > 0, w0, 2 * np.pi / (t[-1] - t[0]))
+    # e^(-a*t_end) = DECAY_LEVEL, t_end = last sample above the level
+    magnitude = np.abs(X)
+    above = magnitude >= DECAY_LEVEL * magnitude.max(axis=1, keepdims=True)
+    t_end = t[n - 1 - above[:, ::-1].argmax(axis=1)] - t[0]
+    a = -np.log(DECAY_LEVEL) / np.maximum(t_end, dt)
+    x0 = X[:, 0]
+    v0 = (X[:, 1] - X[:, 0]) / (t[1] - t[0])
+
+    rows = [(s * a, f * w0 ** 2) for s in SIGMA_STARTS for f in Q_STARTS]
+    # sigma = (slow + fast) / 2, q = -((fast - slow) / 2)^2
+    rows += [((1 + f) / 2 * a, -((f - 1) / 2 * a) ** 2) for f in FAST_POLE_STARTS]
+    theta = np.stack([np.column_stack((sigma, q, x0, v0)) for sigma, q in rows], axis=1).reshape(-1, 4)
+    return theta, np.repeat(np.arange(n_traces), len(rows))
+
+
+def levenberg_marquardt(theta, t, X, max_iter: int = 100, tol: float = 1e-10):
+    """
+    batched Levenberg-Marquardt, one independent fit per row of theta against the matching row of X.
+    each iteration solves all (4x4) normal equations at once; converged fits drop out of the batch.
+    :return: theta, cost (sum of squared residuals), iterations, converged
+    """
+    theta = np.array(theta, dtype=float)
+    n_fits = len(theta)
+    x, J = model(theta, t)
+    r = x - X
+    cost = np.einsum('ij,ij->i', r, r)
+    cost[~np.isfinite(cost)] = np.inf
+    lam = np.full(n_fits, 1e-3)
+    iterations = np.zeros(n_fits, dtype=int)
+    converged = np.zeros(n_fits, dtype=bool)
+    active = np.arange(n_fits)
+    eye = np.eye(4)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        Ja, ra = J[active], r[active]
+        A = Ja @ Ja.transpose(0, 2, 1)
+        g = (Ja @ ra[..., None])[..., 0]
+        # Marquardt scaling by the diagonal, tiny ridge for flat directions
+        diag = np.einsum('fii->fi', A)
+        A_damped = A + (lam[active, None] * diag + 1e-12 * (diag.max(axis=1, keepdims=True) + 1))[..., None] * eye
+        with np.errstate(invalid='ignore', over='ignore'):
+            try:
+                delta = np.linalg.solve(A_damped, -g[..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                delta = np.stack([np.linalg.lstsq(a, -b, rcond=None)[0] for a, b in zip(A_damped, g)])
+            theta_new = theta[active] + delta
+            x_new, J_new = model(theta_new, t)
+            r_new = x_new - X[active]
+            cost_new = np.einsum('ij,ij->i', r_new, r_new)
+        better = np.isfinite(cost_new) & (cost_new < cost[active])
+        improved = active[better]
+        decrease = (cost[improved] - cost_new[better]) / np.maximum(cost[improved], 1e-300)
+        theta[improved] = theta_new[better]
+        r[improved] = r_new[better]
+        J[improved] = J_new[better]
+        cost[improved] = cost_new[better]
+        lam[active] = np.where(better, lam[active] / 3, lam[active] * 4)
+        iterations[active] += 1
+
+        done = np.zeros(active.size, dtype=bool)
+        done[better] = decrease < tol
+        # no step is accepted any more: at a minimum within rounding
+        done |= lam[active] > 1e12
+        converged[active[done]] = True
+        active = active[~done]
+    return theta, cost, iterations, converged
+
+
+def to_physical(theta, mass):
+    """
+    (sigma, q, x0, v0) -> stiffness, damping_coefficient, x0, v0:  k = m*(sigma^2 + q), c = 2*m*sigma
+    """
+    sigma, q, x0, v0 = theta.T
+    return mass * (sigma ** 2 + q), 2 * mass * sigma, x0, v0
+
+
+def fit_traces(t, X, mass=1.0, max_iter: int = 100, screen_iter: int = 10, batch_bytes: int = BATCH_BYTES):
+    """
+    fit many traces sampled on the same grid t in batched LM passes (at most batch_bytes of Jacobian each):
+    every start of every trace runs screen_iter iterations, then only the best start per trace is polished.
+    :param X: (n_traces, n_t) displacement
+    :param mass: scalar or (n_traces,), the fitted stiffness / damping scale with it
+    :return: DataFrame, one row per trace: mass, stiffness, damping_coefficient, x0, v0, rmse, iterations, converged
+    """
+    t = np.asarray(t, dtype=float)
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    n_traces = len(X)
+    theta0, trace = initial_guesses(t, X)
+    n_starts = len(theta0) // n_traces
+    per_batch = max(batch_bytes // (t.size * 4 * 8), 1)
+
+    def run(theta_in, rows_x, iterations):
+        out = (np.empty((len(theta_in), 4)), np.empty(len(theta_in)), np.empty(len(theta_in), dtype=int),
+               np.empty(len(theta_in), dtype=bool))
+        for start in range(0, len(theta_in), per_batch):
+            rows = slice(start, start + per_batch)
+            for buffer, value in zip(out, levenberg_marquardt(theta_in[rows], t, X[rows_x[rows]], iterations)):
+                buffer[rows] = value
+        return out
+
+    # screening: all starts, a few iterations
+    theta, cost, iterations, converged = run(theta0, trace, screen_iter)
+    cost[~np.isfinite(cost)] = np.inf
+    best = cost.reshape(n_traces, n_starts).argmin(axis=1) + np.arange(n_traces) * n_starts
+    # polish the best start of each trace
+    theta, cost, more, converged = run(theta[best], np.arange(n_traces), max_iter)
+    iterations = iterations[best] + more
+
+    mass = np.broadcast_to(np.asarray(mass, dtype=float), (n_traces,))
+    stiffness, damping_coefficient, x0, v0 = to_physical(theta, mass)
+    return pd.DataFrame({
+        'mass': mass,
+        'stiffness': stiffness,
+        'damping_coefficient': damping_coefficient,
+        'x0': x0,
+        'v0': v0,
+        'rmse': np.sqrt(cost / t.size),
+        'iterations': iterations,
+        'converged': converged,
+    })
+
+
+def fit_file(path, mass=1.0, max_samples: int | None = 20000):
+    """
+    :return: dict of the fitted parameters of one trace file
+    """
+    t, x = load_trace(path, max_samples)
+    # the model starts at t = 0
+    row = fit_traces(t - t[0], x[None, :], mass).iloc[0].to_dict()
+    row['t_start'] = float(t[0])
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('traces', nargs='+', help='.csv (t, x columns) or .npy (n, 2+) files')
+    parser.add_argument('--mass', type=float, default=1.0)
+    parser.add_argument('--max-samples', type=int, default=20000, help='thin long traces to this many samples')
+    parser.add_argument('--output', help='write the fits as csv')
+    args = parser.parse_args()
+
+    rows = []
+    for path in args.traces:
+        row = fit_file(path, args.mass, args.max_samples)
+        row['file'] = path
+        rows.append(row)
+        print(f"{path}: k={row['stiffness']:.6g} c={row['damping_coefficient']:.6g} x0={row['x0']:.6g} "
+              f"v0={row['v0']:.6g} rmse={row['rmse']:.3g}")
+    if args.output:
+        pd.DataFrame(rows).to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+batched ODE integration of
+    m*x'' + c*x' + k*x + k3*x^3 + F_c*sign(x') = f(t)
+for the cases the closed forms in oscillator_math cannot cover: external forcing f(t), Duffing cubic
+stiffness k3 and Coulomb friction F_c. every parameter set of the batch advances in the same vectorized step.
+initial state (x0, v0) at t = 0, like calculate.
+
+methods:
+    rk4   classic Runge-Kutta, fixed substeps per output interval
+    rk45  adaptive Dormand-Prince 5(4), one step size per parameter set, cubic Hermite output
+    expm  exponential integrator: the linear part m*x'' + c*x' + k*x advances with expm(A*h), computed once per
+          parameter set instead of once per sample (Oscillator.oscillator_math_old). exact without forcing and
+          nonlinear terms, second order (ETD2RK) in them. needs a uniform t grid
+"""
+import numpy as np
+
+METHODS = ('rk4', 'rk45', 'expm')
+# fixed-step methods: steps per period of the fastest time scale, unless max_step is given
+STEPS_PER_PERIOD = 100
+# Dormand-Prince 5(4) tableau
+DP_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+# 5th order weights are the last row of DP_A (FSAL), E = b5 - b4
+DP_E = np.array([71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+# 4th order continuous extension (Shampine), y(t0 + s*h) = y0 + h * sum_j k_j * (P @ [s, s^2, s^3, s^4])_j
+DP_P = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+
+def harmonic_forcing(amplitude, frequency, phase=0.0):
+    """
+    f(t) = amplitude * cos(frequency*t + phase), each argument scalar or one value per parameter set
+    """
+    amplitude, frequency, phase = (np.asarray(p, dtype=float) for p in (amplitude, frequency, phase))
+
+    def forcing(t):
+        shape = (-1,) + (1,) * (t.ndim - 1)
+        return amplitude.reshape(shape) * np.cos(frequency.reshape(shape) * t + phase.reshape(shape))
+
+    # the arguments, so the forcing can be described and rebuilt (data_export metadata)
+    forcing.harmonic = {'amplitude': amplitude.tolist(), 'frequency': frequency.tolist(), 'phase': phase.tolist()}
+    return forcing
+
+
+def per_row(p, like):
+    """(n,) parameter against a (n,) or (n, m) array"""
+    return p.reshape(p.shape + (1,) * (like.ndim - 1))
+
+
+class OscillatorODE:
+    """
+    right-hand side of the batch. parameters are broadcast to (n,).
+    forcing: callable f(t) or None; t has the batch on its first axis ((n,) or (n, m)), returns the same shape
+    """
+
+    def __init__(self, mass, stiffness, damping_coefficient, cubic_stiffness=0.0, friction_force=0.0, forcing=None):
+        self.m, self.k, self.c, self.k3, self.friction = (
+            np.atleast_1d(np.asarray(p, dtype=float)) for p in
+            np.broadcast_arrays(mass, stiffness, damping_coefficient, cubic_stiffness, friction_force))
+        self.forcing = forcing
+        self.n = self.m.size
+        self.linear = not (self.k3.any() or self.friction.any() or forcing is not None)
+
+    def force(self, t, x, v):
+        """every force except friction"""
+        force = -(per_row(self.c, x) * v + per_row(self.k, x) * x)
+        if self.k3.any():
+            force -= per_row(self.k3, x) * x ** 3
+        if self.forcing is not None:
+            force += self.forcing(t)
+        return force
+
+    def acceleration(self, t, x, v):
+        force = self.force(t, x, v)
+        if self.friction.any():
+            friction = per_row(self.friction, x)
+            # sliding: opposes v; stuck (v == 0): holds as long as the other forces stay below F_c
+            force -= np.where(v != 0, friction * np.sign(v), np.clip(force, -friction, friction))
+        return force / per_row(self.m, x)
+
+    def stick(self, t, x, v_old, v_new):
+        """
+        v changed sign during the step: if friction can hold the mass there it stops (v = 0) instead of reversing.
+        a single step cannot resolve the stop exactly, this keeps it from chattering around v = 0
+        """
+        if not self.friction.any():
+            return v_new
+        crossed = (v_old != 0) & (np.sign(v_new) != np.sign(v_old))
+        if crossed.any():
+            held = crossed & (np.abs(self.force(t, x, np.zeros_like(x))) <= self.friction)
+            v_new = np.where(held, 0.0, v_new)
+        return v_new
+
+    def time_scale(self, x0, v0):
+        """
+        shortest time scale of the linear part, the cubic term evaluated at the amplitude of the initial energy
+        (forcing is not known in advance, pass max_step for fast forcing)
+        :return: (n,) seconds per radian
+        """
+        energy = 0.5 * self.m * v0 ** 2 + 0.5 * self.k * x0 ** 2 + 0.25 * np.abs(self.k3) * x0 ** 4
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amplitude = np.where(self.k > 0, np.sqrt(2 * energy / self.k), np.abs(x0) + np.abs(v0))
+            rate = np.sqrt(np.abs(self.k + 3 * self.k3 * amplitude ** 2) / self.m)
+            rate = np.maximum(rate, self.c / self.m)
+        return np.where(rate > 0, 1 / rate, np.inf)
+
+    def propagator(self, h):
+        """
+        expm of the augmented matrix [[A*h, I*h, 0], [0, 0, I*h], [0, 0, 0]]:
+        top row = e^(A*h), h*phi1(A*h), h^2*phi2(A*h) (Van Loan), one 6x6 expm per parameter set.
+        only the v column of phi1 / phi2 is kept, the nonlinear terms act on v only
+        :return: phi (n, 2, 2), p1 (n, 2), p2 (n, 2)
+        """
+        from scipy.linalg import expm
+        M = np.zeros((self.n, 6, 6))
+        M[:, 0, 1] = 1.0
+        M[:, 1, 0] = -self.k / self.m
+        M[:, 1, 1] = -self.c / self.m
+        M[:, 0, 2] = M[:, 1, 3] = M[:, 2, 4] = M[:, 3, 5] = 1.0
+        E = expm(M * h)
+        return E[:, :2, :2], E[:, :2, 3], E[:, :2, 5] / h
+
+
+def rk4_step(ode, t, h, x, v):
+    """one classic RK4 step, t and h scalar or (n,)"""
+    a1 = ode.acceleration(t, x, v)
+    x2, v2 = x + 0.5 * h * v, v + 0.5 * h * a1
+    a2 = ode.acceleration(t + 0.5 * h, x2, v2)
+    x3, v3 = x + 0.5 * h * v2, v + 0.5 * h * a2
+    a3 = ode.acceleration(t + 0.5 * h, x3, v3)
+    x4, v4 = x + h * v3, v + h * a3
+    a4 = ode.acceleration(t + h, x4, v4)
+    x_new = x + h / 6 * (v + 2 * v2 + 2 * v3 + v4)
+    v_new = v + h / 6 * (a1 + 2 * a2 + 2 * a3 + a4)
+    return x_new, ode.stick(t + h, x_new, v, v_new)
+
+
+def etd2_step(ode, t, h, x, v, prop):
+    """
+    one ETD2RK step (Cox & Matthews): linear part exact, N = acceleration - linear acceleration
+    """
+    phi, p1, p2 = prop
+    if ode.linear:
+        return phi[:, 0, 0] * x + phi[:, 0, 1] * v, phi[:, 1, 0] * x + phi[:, 1, 1] * v
+    k_m, c_m = ode.k / ode.m, ode.c / ode.m
+    n0 = ode.acceleration(t, x, v) + k_m * x + c_m * v
+    xa = phi[:, 0, 0] * x + phi[:, 0, 1] * v + p1[:, 0] * n0
+    va = phi[:, 1, 0] * x + phi[:, 1, 1] * v + p1[:, 1] * n0
+    n1 = ode.acceleration(t + h, xa, va) + k_m * xa + c_m * va
+    x_new = xa + p2[:, 0] * (n1 - n0)
+    v_new = va + p2[:, 1] * (n1 - n0)
+    return x_new, ode.stick(t + h, x_new, v, v_new)
+
+
+def fixed_step(ode, t, x, v, max_step, method):
+    """
+    rk4 / expm on the output grid, every interval split into equal substeps of at most max_step
+    :return: x, v (n, n_t), steps
+    """
+    X = np.empty((ode.n, t.size))
+    V = np.empty((ode.n, t.size))
+    # initial state at 0, the grid may start later
+    prepended = t[0] > 0
+    edges = np.concatenate(([0.0], t)) if prepended else t
+    if not prepended:
+        X[:, 0], V[:, 0] = x, v
+    gaps = np.diff(edges)
+    substeps = np.maximum(np.ceil(gaps / max_step), 1).astype(int)
+    propagators = {}
+    steps = 0
+    for i, (gap, n_sub) in enumerate(zip(gaps, substeps)):
+        h = gap / n_sub
+        if gap == 0:
+            X[:, i + 1 - prepended], V[:, i + 1 - prepended] = x, v
+            continue
+        if method == 'expm':
+            # uniform grid: at most two distinct step sizes (initial gap and the grid step)
+            key = round(h, 12)
+            if key not in propagators:
+                propagators[key] = ode.propagator(h)
+        for j in range(n_sub):
+            t_j = np.full(ode.n, edges[i] + j * h)
+            if method == 'expm':
+                x, v = etd2_step(ode, t_j, h, x, v, propagators[key])
+            else:
+                x, v = rk4_step(ode, t_j, h, x, v)
+        steps += n_sub
+        X[:, i + 1 - prepended], V[:, i + 1 - prepended] = x, v
+    return X, V, np.full(ode.n, steps)
+
+
+def dormand_prince(ode, t, x, v, rtol, atol, max_step):
+    """
+    adaptive DP5(4) with a step size per row. all rows advance in every iteration, rows that are done take
+    zero-length steps (the forcing callable always sees the whole batch).
+    output samples inside an accepted step come from the continuous extension DP_P
+    :return: x, v (n, n_t), accepted steps per row
+    """
+    n, n_t = ode.n, t.size
+    t_end = t[-1]
+    X = np.empty((n, n_t))
+    V = np.empty((n, n_t))
+    now = np.zeros(n)
+    next_out = np.zeros(n, dtype=int)
+    steps = np.zeros(n, dtype=int)
+    scale = ode.time_scale(x, v)
+    h = np.minimum(0.01 * np.where(np.isfinite(scale), scale, t_end), max_step)
+    h = np.where(h > 0, h, t_end)
+    a = ode.acceleration(now, x, v)
+    # samples at t = 0
+    at_start = t <= 0
+    X[:, at_start], V[:, at_start] = x[:, None], v[:, None]
+    next_out[:] = at_start.sum()
+
+    while (next_out < n_t).any():
+        active = now < t_end
+        h_step = np.where(active, np.minimum(h, t_end - now), 0.0)
+        kx, kv = [v], [a]
+        for stage in range(1, 7):
+            xs = x + h_step * sum(w * k for w, k in zip(DP_A[stage], kx))
+            vs = v + h_step * sum(w * k for w, k in zip(DP_A[stage], kv))
+            kx.append(vs)
+            kv.append(ode.acceleration(now + DP_C[stage] * h_step, xs, vs))
+        # FSAL: stage 7 is evaluated at the 5th order solution
+        x_new, v_new = xs, vs
+        err_x = h_step * sum(e * k for e, k in zip(DP_E, kx))
+        err_v = h_step * sum(e * k for e, k in zip(DP_E, kv))
+        tol_x = atol + rtol * np.maximum(np.abs(x), np.abs(x_new))
+        tol_v = atol + rtol * np.maximum(np.abs(v), np.abs(v_new))
+        err = np.sqrt(0.5 * ((err_x / tol_x) ** 2 + (err_v / tol_v) ** 2))
+        err = np.where(np.isfinite(err), err, np.inf)
+        accept = active & (err <= 1.0)
+        # a step that cannot shrink any further is taken anyway (friction discontinuity)
+        accept |= active & (h_step <= 1e-12 * max(t_end, 1.0))
+
+        t_new = np.where(h_step == t_end - now, t_end, now + h_step)
+        v_stuck = ode.stick(t_new, x_new, v, v_new)
+        # output times inside (now, t_new] of every accepted row, filled in one go
+        stop = np.where(accept, np.searchsorted(t, t_new, side='right'), next_out)
+        counts = stop - next_out
+        if counts.any():
+            rows = np.repeat(np.arange(n), counts)
+            cols = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + next_out[rows]
+            hr = h_step[rows]
+            s = (t[cols] - now[rows]) / hr
+            q = DP_P @ np.stack((s, s ** 2, s ** 3, s ** 4))
+            kx, kv = np.array(kx), np.array(kv)
+            X[rows, cols] = x[rows] + hr * np.einsum('jr,jr->r', q, kx[:, rows])
+            V[rows, cols] = np.where(t[cols] == t_new[rows], v_stuck[rows],
+                                     v[rows] + hr * np.einsum('jr,jr->r', q, kv[:, rows]))
+            next_out = stop
+        a_new = kv[6] if v_stuck is v_new else ode.acceleration(t_new, x_new, v_stuck)
+        x = np.where(accept, x_new, x)
+        v = np.where(accept, v_stuck, v)
+        a = np.where(accept, a_new, a)
+        now = np.where(accept, t_new, now)
+        steps += accept
+
+        with np.errstate(divide='ignore'):
+            factor = np.clip(0.9 * err ** -0.2, 0.2, 5.0)
+        factor = np.where(accept, factor, np.minimum(factor, 1.0))
+        h = np.where(active, np.minimum(h_step * factor, max_step), h)
+        h = np.maximum(h, 1e-12 * max(t_end, 1.0))
+    return X, V, steps
+
+
+def integrate_batch(mass, stiffness, damping_coefficient, x0, v0, t, cubic_stiffness=0.0, friction_force=0.0,
+                    forcing=None, method: str = 'rk45', rtol: float = 1e-8, atol: float = 1e-10,
+                    max_step: float | None = None):
+    """
+    integrate every parameter set (all arguments scalar or 1-D, broadcast) on the common grid t
+    :param t: increasing output times >= 0, the initial state is at t = 0
+    :param forcing: f(t) or None, see OscillatorODE; harmonic_forcing() builds the usual one
+    :param method: 'rk4', 'rk45' or 'expm'
+    :param rtol, atol: rk45 tolerances on x and v
+    :param max_step: upper step bound; rk4 / expm default to STEPS_PER_PERIOD steps per fastest period
+    :return: dict{'x', 'v', 'a': (n_params, n_t), 'steps': (n_params,) steps taken}
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}, expected one of {', '.join(METHODS)}")
+    t = np.asarray(t, dtype=float)
+    if t.ndim != 1 or t.size == 0 or t[0] < 0 or (np.diff(t) < 0).any():
+        raise ValueError("t must be a non-empty increasing 1-D grid starting at t >= 0")
+    ode = OscillatorODE(mass, stiffness, damping_coefficient, cubic_stiffness, friction_force, forcing)
+    x0, v0 = (np.broadcast_to(np.asarray(p, dtype=float), (ode.n,)).copy() for p in (x0, v0))
+
+    if method == 'rk45':
+        X, V, steps = dormand_prince(ode, t, x0, v0, rtol, atol, np.inf if max_step is None else max_step)
+    else:
+        if method == 'expm' and t.size > 2:
+            dt = (t[-1] - t[0]) / (t.size - 1)
+            if np.abs(np.diff(t) - dt).max() > 1e-6 * dt:
+                raise ValueError("the expm method needs a uniform t grid")
+        if max_step is None and method == 'expm' and ode.linear:
+            # the propagator is exact, one step per output interval
+            max_step = np.inf
+        elif max_step is None:
+            scale = ode.time_scale(x0, v0).min()
+            max_step = 2 * np.pi * scale / STEPS_PER_PERIOD if np.isfinite(scale) else max(t[-1], 1.0)
+        X, V, steps = fixed_step(ode, t, x0, v0, max_step, method)
+    tt = np.broadcast_to(t, X.shape)
+    return {'x': X, 'v': V, 'a': ode.acceleration(tt, X, V), 'steps': steps}
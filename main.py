@@ -1,16 +1,16 @@
 package = 'pythonProject'
-import pandas as pd
-import numpy as np
-from scipy.linalg import expm
-import matplotlib.pyplot as plt
-import Oscillator
+import time
+
+_start = time.perf_counter()
+
 from main_window import DashboardApp
-import tkinter as tk
 
-from matplotlib.widgets import *
+# matplotlib / SciPy / pandas / Oscillator 不在这里导入, 由 DashboardApp.open_window 在第一次打开窗口时导入
 
 if __name__ == '__main__':
     app = DashboardApp()
+    # cold start: interpreter ready -> first idle of the Tk main loop
+    app.after_idle(lambda: print(f"Startup: {(time.perf_counter() - _start) * 1e3:.1f} ms"))
     app.mainloop()
     # Oscillator
 
@@ -22,5 +22,3 @@ if __name__ == '__main__':
     # button_test=Button(axes, label='test',color='yellow')
     # button_test.on_clicked(Oscillator.oscillator_math(10,2))
     # plt.show()
-
-
@@ -0,0 +1,171 @@
+"""
+N degree-of-freedom systems  M x'' + C x' + K x = 0  by modal decomposition.
+the eigenproblem is solved once per (M, K, C) and cached; a response on a t grid is then the modal responses
+(N, n_t) and one matrix product with the mode shapes, instead of an expm per sample.
+
+classical damping (C M^-1 K = K M^-1 C, e.g. Rayleigh C = a*M + b*K): real mass-normalized modes from the
+generalized symmetric problem K phi = w^2 M phi, every mode is a single oscillator evaluated by the closed forms
+of OscillatorMath.calculate_batch (all damping regimes).
+any other damping: complex modes of the 2N state-space matrix [[0, I], [-M^-1 K, -M^-1 C]].
+"""
+import numpy as np
+
+from oscillator_math import OscillatorMath
+from result_cache import ResultCache
+
+# decompositions per (M, K, C), bounded like the result cache
+DECOMPOSITION_CACHE = ResultCache(max_entries=32, max_bytes=256 * 2 ** 20)
+# relative commutator norm below which damping is treated as classical
+CLASSICAL_RTOL = 1e-9
+# modes with w_n below this fraction of the highest are rigid-body modes
+RIGID_TOL = 1e-8
+
+
+def chain_matrices(masses, stiffnesses, damping_coefficients=0.0):
+    """
+    masses in a line, spring / damper i connects mass i to mass i-1, the first ones to the wall
+    :return: M, K, C (N, N)
+    """
+    masses = np.atleast_1d(np.asarray(masses, dtype=float))
+    stiffnesses, damping_coefficients = (np.broadcast_to(np.asarray(p, dtype=float), masses.shape)
+                                         for p in (stiffnesses, damping_coefficients))
+
+    def coupling(values):
+        diagonal = values.copy()
+        diagonal[:-1] += values[1:]
+        return np.diag(diagonal) - np.diag(values[1:], 1) - np.diag(values[1:], -1)
+
+    return np.diag(masses), coupling(stiffnesses), coupling(damping_coefficients)
+
+
+def matrix_key(M, K, C):
+    return M.shape, hash(M.tobytes()), hash(K.tobytes()), hash(C.tobytes())
+
+
+def is_classical(M, K, C):
+    MK, MC = np.linalg.solve(M, K), np.linalg.solve(M, C)
+    commutator = C @ MK - K @ MC
+    scale = np.linalg.norm(C @ MK) + np.linalg.norm(K @ MC)
+    return np.linalg.norm(commutator) <= CLASSICAL_RTOL * scale
+
+
+def decompose(M, K, C):
+    """
+    :return: classical: dict{'shapes': Phi (N, N) mass-normalized, 'projection': Phi^T M, 'w_n', 'zeta',
+                             'modal_damping': diag(Phi^T C Phi)}
+             otherwise: dict{'eigenvalues', 'vectors' (2N, n), 'inverse' (n, 2N)} of the n eigenvalues with Im >= 0,
+             the conjugate of each complex one is folded into a factor 2 on its row of the inverse
+    """
+    from scipy.linalg import eigh
+    n = M.shape[0]
+    if is_classical(M, K, C):
+        w2, shapes = eigh(K, M)
+        w_n = np.sqrt(np.clip(w2, 0.0, None))
+        modal_damping = np.einsum('ij,ik,kj->j', shapes, C, shapes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zeta = np.where(w_n > 0, modal_damping / (2 * w_n), np.inf)
+        return {'shapes': shapes, 'projection': shapes.T @ M, 'w_n': w_n, 'zeta': zeta,
+                'modal_damping': modal_damping}
+    A = np.zeros((2 * n, 2 * n))
+    A[:n, n:] = np.eye(n)
+    A[n:, :n] = -np.linalg.solve(M, K)
+    A[n:, n:] = -np.linalg.solve(M, C)
+    eigenvalues, vectors = np.linalg.eig(A)
+    # A is real: complex eigenvalues come in exact conjugate pairs, Re(z) + Re(conj(z)) = 2*Re(z)
+    keep = eigenvalues.imag >= 0
+    inverse = np.linalg.inv(vectors)[keep] * np.where(eigenvalues.imag > 0, 2.0, 1.0)[keep, None]
+    eigenvalues, vectors = eigenvalues[keep], vectors[:, keep]
+    order = np.argsort(np.abs(eigenvalues))
+    return {'eigenvalues': eigenvalues[order], 'vectors': vectors[:, order], 'inverse': inverse[order]}
+
+
+class ModalSystem:
+    """
+    mass / stiffness / damping matrices (N, N), damping defaults to none.
+    the decomposition is computed on first use and shared through DECOMPOSITION_CACHE
+    """
+
+    def __init__(self, mass, stiffness, damping=None):
+        self.M = np.ascontiguousarray(mass, dtype=float)
+        self.K = np.ascontiguousarray(stiffness, dtype=float)
+        self.C = np.zeros_like(self.K) if damping is None else np.ascontiguousarray(damping, dtype=float)
+        n = self.M.shape[0]
+        for name, matrix in (('mass', self.M), ('stiffness', self.K), ('damping', self.C)):
+            if matrix.shape != (n, n):
+                raise ValueError(f"{name} matrix must be ({n}, {n}), got {matrix.shape}")
+        self.n = n
+        self._decomposition = None
+
+    def decomposition(self):
+        if self._decomposition is None:
+            key = matrix_key(self.M, self.K, self.C)
+            self._decomposition = DECOMPOSITION_CACHE.get(key)
+            if self._decomposition is None:
+                self._decomposition = decompose(self.M, self.K, self.C)
+                DECOMPOSITION_CACHE.put(key, self._decomposition)
+        return self._decomposition
+
+    @property
+    def classical(self):
+        return 'shapes' in self.decomposition()
+
+    def modes(self):
+        """
+        classical: dict{'w_n', 'f_n', 'zeta', 'shapes' (N, N), column j = mode j}, sorted by frequency
+        otherwise: dict{'eigenvalues', 'shapes' complex displacement part}, eigenvalues with Im >= 0 (one per
+                   oscillating mode, two real ones per overdamped mode) sorted by |eigenvalue|
+        """
+        d = self.decomposition()
+        if 'shapes' in d:
+            return {'w_n': d['w_n'], 'f_n': d['w_n'] / (2 * np.pi), 'zeta': d['zeta'], 'shapes': d['shapes']}
+        return {'eigenvalues': d['eigenvalues'], 'shapes': d['vectors'][:self.n]}
+
+    def response(self, t, x0, v0=None, derivatives: bool = False):
+        """
+        free response from displacement x0 / velocity v0 (N,) at t = 0
+        :return: dict{'x': (N, n_t), 'modal': (n_modes, n_t) modal coordinates}, plus 'v' (N, n_t) with derivatives
+        """
+        t = np.asarray(t, dtype=float)
+        x0 = np.asarray(x0, dtype=float)
+        v0 = np.zeros(self.n) if v0 is None else np.asarray(v0, dtype=float)
+        d = self.decomposition()
+        if 'shapes' not in d:
+            # y(t) = Re(V e^(lambda*t) V^-1 y0), one eigenvalue per conjugate pair
+            coefficients = d['inverse'] @ np.concatenate((x0, v0))
+            modal = np.exp(np.multiply.outer(d['eigenvalues'], t))
+            modal *= coefficients[:, None]
+            results = {'x': (d['vectors'][:self.n] @ modal).real, 'modal': modal}
+            if derivatives:
+                results['v'] = (d['vectors'][self.n:] @ modal).real
+            return results
+
+        q0, qd0 = d['projection'] @ x0, d['projection'] @ v0
+        w_n, c = d['w_n'], d['modal_damping']
+        elastic = w_n > RIGID_TOL * max(w_n.max(), 1.0)
+        Q = np.zeros((self.n, t.size))
+        Qd = np.zeros((self.n, t.size)) if derivatives else None
+        if elastic.any():
+            # unit modal mass: m = 1, k = w^2, c = 2*zeta*w
+            batch = OscillatorMath().calculate_batch(1.0, w_n[elastic] ** 2, c[elastic], q0[elastic], qd0[elastic],
+                                                     t, solver='closed_form', derivatives=derivatives)
+            Q[elastic] = batch['x']
+            if derivatives:
+                Qd[elastic] = batch['v']
+            # calculate_batch turns a mode at rest into a unit displacement
+            at_rest = elastic & (q0 == 0.0) & (qd0 == 0.0)
+            Q[at_rest] = 0.0
+            if derivatives:
+                Qd[at_rest] = 0.0
+        rigid = ~elastic
+        if rigid.any():
+            # q'' + c*q' = 0
+            cr = c[rigid, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                drift = np.where(cr > 0, -np.expm1(-cr * t) / cr, t)
+            Q[rigid] = q0[rigid, None] + qd0[rigid, None] * drift
+            if derivatives:
+                Qd[rigid] = qd0[rigid, None] * np.exp(-cr * t)
+        results = {'x': d['shapes'] @ Q, 'modal': Q}
+        if derivatives:
+            results['v'] = d['shapes'] @ Qd
+        return results
@@ -1,5 +1,97 @@
+import copy
+
 import numpy as np
 
+from integrator import integrate_batch
+
+# regime codes used by the batched routines
+UNDERDAMPED = 0
+CRITICALLY_DAMPED = 1
+OVERDAMPED = 2
+
+# grids shorter than this are evaluated directly, the recurrence does not pay off
+RECURRENCE_MIN_SIZE = 4096
+
+# adaptive grid defaults
+SAMPLES_PER_PERIOD = 40
+SETTLE_TOLERANCE = 1e-3
+UNDAMPED_PERIODS = 20
+
+
+def classify_regime(zeta):
+    """
+    regime code per damping ratio, same branch order as calculate
+    :return: int8 array of UNDERDAMPED / CRITICALLY_DAMPED / OVERDAMPED, -1 where zeta is nan
+    """
+    zeta = np.asarray(zeta)
+    under = zeta < 1.0
+    crit = ~under & np.isclose(zeta, 1.0)
+    over = ~under & ~crit & (zeta > 1.0)
+    regime = np.full(zeta.shape, -1, dtype=np.int8)
+    regime[under] = UNDERDAMPED
+    regime[crit] = CRITICALLY_DAMPED
+    regime[over] = OVERDAMPED
+    return regime
+
+
+def uniform_step(t, rtol: float = 1e-6):
+    """
+    :return: the constant step of t, or None if t is not a uniform 1-D grid
+    """
+    if t.ndim != 1 or t.size < 3:
+        return None
+    dt = (t[-1] - t[0]) / (t.size - 1)
+    if dt == 0 or np.abs(np.diff(t) - dt).max() > rtol * abs(dt):
+        return None
+    return dt
+
+
+def underdamped_recurrence(A, B, decay_rate, w_d, t0, dt, n, velocity=None):
+    """
+    x(t0+i*dt) = Re((A-iB) * e^((-a+iw)(t0+i*dt))) advanced by the constant multiplier z=e^((-a+iw)dt).
+    z^0..z^(block-1) is built once and every block starts from an exactly evaluated anchor,
+    so rounding drift is bounded by one block and only ~2*sqrt(n) exponentials are evaluated.
+    velocity: (A_v, B_v), v(t) has the same form and reuses the multipliers
+    :return: x, decay, v  (decay = e^(-a*t), for the envelope; v is None without velocity)
+    """
+    block = max(64, int(np.sqrt(n)))
+    n_blocks = -(-n // block)
+    s = complex(-decay_rate, w_d)
+    k = np.arange(block) * dt
+    steps = np.exp(s * k)
+    t_anchor = t0 + np.arange(n_blocks) * (block * dt)
+    phase = np.exp(s * t_anchor)
+    anchors = (A - 1j * B) * phase
+
+    x = np.multiply.outer(anchors.real, steps.real)
+    x -= np.multiply.outer(anchors.imag, steps.imag)
+    decay = np.multiply.outer(np.exp(-decay_rate * t_anchor), np.exp(-decay_rate * k))
+    v = None
+    if velocity is not None:
+        A_v, B_v = velocity
+        anchors = (A_v - 1j * B_v) * phase
+        v = np.multiply.outer(anchors.real, steps.real)
+        v -= np.multiply.outer(anchors.imag, steps.imag)
+        v = v.ravel()[:n]
+    return x.ravel()[:n], decay.ravel()[:n], v
+
+
+class CalculateWorkspace:
+    """
+    preallocated buffers for repeated calculate(workspace=...) calls on one fixed grid.
+    results are written in place into x / envelope (overwritten by every call), pass your own arrays
+    to have them filled instead. dtype=np.float32 halves memory and bandwidth.
+    derivatives: also allocate v / a for calculate(derivatives=True)
+    """
+
+    def __init__(self, t, dtype=np.float64, x=None, envelope=None, derivatives: bool = False):
+        self.t = np.ascontiguousarray(t, dtype=dtype)
+        self.x = np.empty_like(self.t) if x is None else x
+        self.envelope = np.empty_like(self.t) if envelope is None else envelope
+        self.scratch = np.empty_like(self.t)
+        self.v = np.empty_like(self.t) if derivatives else None
+        self.a = np.empty_like(self.t) if derivatives else None
+
 
 class OscillatorMath:
     mass:float=0.0
@@ -8,6 +100,12 @@ class OscillatorMath:
     x0:float=0.0
     v0:float=0.0
     t :np.ndarray | None = None
+    # terms without a closed form, integrated numerically (integrator.py); forcing: f(t) or None
+    cubic_stiffness:float=0.0
+    friction_force:float=0.0
+    forcing = None
+    # 'auto': closed form unless the terms above are set (then 'rk45'), 'closed_form', 'rk4', 'rk45' or 'expm'
+    solver:str='auto'
 
     def update_value(self, key:str, value):
         if hasattr(self, key):
@@ -29,25 +127,165 @@ class OscillatorMath:
         for i in range(len(params)):
             setattr(self, param_list[i], params[i])
 
+    def integrator_method(self, solver: str | None = None):
+        """
+        :return: the integrator method used for solver (default self.solver), None for the closed form
+        """
+        solver = self.solver if solver is None else solver
+        if solver == 'closed_form':
+            return None
+        if solver == 'auto':
+            nonlinear = self.cubic_stiffness != 0.0 or self.friction_force != 0.0 or self.forcing is not None
+            return 'rk45' if nonlinear else None
+        return solver
+
+    def adaptive_grid(self, samples_per_period: int = SAMPLES_PER_PERIOD, settle_tol: float = SETTLE_TOLERANCE,
+                      min_samples: int = 200, max_samples: int = 10 ** 6, refine: bool = False,
+                      refine_points: int = 9):
+        """
+        time grid from the system's own time scales.
+        horizon: until the slowest decay (1+a*t)*e^(-a*t) reaches settle_tol (a = zeta*w_n, or the slow pole
+        when overdamped; UNDAMPED_PERIODS periods without damping).
+        density: from the pole scale s = max(w_n, 2*zeta*w_n) (the sum of both poles' magnitudes at and above
+        critical damping, so the fast overdamped pole is resolved): at least samples_per_period per 2*pi/s and a
+        step of at most 2*sqrt(settle_tol)/s, linear interpolation between samples stays within settle_tol of the
+        peak.
+        refine: add refine_points samples spread over +-1 step around every zero / peak / valley
+                (of the closed-form linear part when an integrator is used)
+        :return: t, uniform unless refined
+        """
+        if self.x0 == 0.0 and self.v0 == 0.0:
+            x0 = 1.0
+        else:
+            x0 = self.x0
+        c, m, k = self.damping_coefficient, self.mass, self.stiffness
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zeta = c / (2 * np.sqrt(k * m))
+            w_n = np.sqrt(k / m)
+        if not (np.isfinite(zeta) and np.isfinite(w_n) and w_n > 0):
+            return np.linspace(0, 10, 500)
+
+        if zeta < 1.0:
+            w = w_n * np.sqrt(1 - zeta ** 2)
+            rate = zeta * w_n
+        else:
+            w = w_n
+            rate = w_n * (zeta - np.sqrt(zeta ** 2 - 1))
+        period = 2 * np.pi / w
+        # ln(1+L) covers the (1+a*t) factor near critical damping
+        settle = -np.log(settle_tol)
+        horizon = (settle + np.log1p(settle)) / rate if rate > 0 else UNDAMPED_PERIODS * period
+        # |x''| <= 2*zeta*w_n*|x'| + w_n^2*|x|, linear interpolation error <= max|x''|*dt^2/8; max|x''| reaches
+        # ~1.4*scale^2 of the peak around critical damping (x0 = 0), hence 4*tol instead of 8*tol
+        scale = w_n * max(1.0, 2 * zeta)
+        step = min(2 * np.pi / samples_per_period, 2 * np.sqrt(settle_tol)) / scale
+        n = int(np.clip(np.ceil(horizon / step) + 1, min_samples, max_samples))
+        t = np.linspace(0, horizon, n)
+        if not refine:
+            return t
+
+        om = copy.copy(self)
+        om.t = t
+        om.x0 = x0
+        # integrated solutions have no critical points
+        om.solver = 'closed_form'
+        crit = om.calculate(all_crit_points=True)['crit_points']
+        centers = np.concatenate([crit[kind][:, 0] for kind in ('zeros', 'peaks', 'valleys')])
+        step = t[1] - t[0]
+        extra = (centers[:, None] + np.linspace(-step, step, refine_points)).ravel()
+        extra = extra[(extra >= 0) & (extra <= horizon)]
+        return np.unique(np.concatenate((t, extra)))
 
-    def calculate(self):
+    def calculate(self, all_crit_points: bool = False, uniform: bool | None = None,
+                  workspace: CalculateWorkspace | None = None, adaptive: bool = False, derivatives: bool = False):
+        """
+        :param all_crit_points: return every zero/peak/valley inside the t range as (n, 2) arrays of (t, x),
+                                for all regimes, instead of the first two of the underdamped case
+        :param uniform: t is uniformly spaced, use the constant-multiplier recurrence for the underdamped case.
+                        None detects it for grids of at least RECURRENCE_MIN_SIZE samples, False disables it
+        :param workspace: evaluate on workspace.t with in-place ufuncs into workspace.x / workspace.envelope
+                          instead of allocating (the recurrence is not used in this mode)
+        :param adaptive: evaluate on adaptive_grid() instead of self.t
+        :param derivatives: also return velocity v(t) and acceleration a(t), v from the same decay/cos/sin
+                            (or exponential) terms as x, a = -(c*v + k*x)/m from the equation of motion.
+                            with a workspace they are written into workspace.v / workspace.a
+        :return: dict{'x', 'envelope', 'crit_points', 't'}, plus 'v', 'a' with derivatives.
+                 when an integrator is used (integrator_method) envelope and crit_points are None,
+                 all_crit_points is ignored
+        """
         def cal_underdamped():
             w_d = w_n * np.sqrt(1 - zeta ** 2)
             # damped natural frequency
             A = x0
             B = (v0 + zeta * w_n * x0) / w_d
-            decay = np.exp(-zeta * w_n * t)
-            x = decay * (A * np.cos(w_d * t) + B * np.sin(w_d * t))
+            combined_amp = np.sqrt(A ** 2 + B ** 2)
+            # v(t) = e^(-at) * (A_v*cos + B_v*sin)
+            A_v = v0
+            B_v = -w_n * (zeta * v0 + w_n * x0) / w_d
+            if workspace is not None:
+                # envelope buffer doubles as scratch for the sine term until the end
+                decay, x, upper_envelope = workspace.scratch, workspace.x, workspace.envelope
+                np.multiply(t, -zeta * w_n, out=decay)
+                np.exp(decay, out=decay)
+                np.multiply(t, w_d, out=upper_envelope)
+                if derivatives:
+                    # cosine kept in v, a is scratch until the acceleration is written
+                    v, tmp = workspace.v, workspace.a
+                    np.cos(upper_envelope, out=v)
+                    np.sin(upper_envelope, out=upper_envelope)
+                    np.multiply(v, A, out=x)
+                    np.multiply(upper_envelope, B, out=tmp)
+                    x += tmp
+                    x *= decay
+                    v *= A_v
+                    np.multiply(upper_envelope, B_v, out=tmp)
+                    v += tmp
+                    v *= decay
+                else:
+                    v = None
+                    np.cos(upper_envelope, out=x)
+                    np.sin(upper_envelope, out=upper_envelope)
+                    x *= A
+                    upper_envelope *= B
+                    x += upper_envelope
+                    x *= decay
+                np.multiply(decay, combined_amp, out=upper_envelope)
+                return x, upper_envelope, v
+            v = None
+            if dt is not None:
+                x, decay, v = underdamped_recurrence(A, B, zeta * w_n, w_d, t[0], dt, t.size,
+                                                     velocity=(A_v, B_v) if derivatives else None)
+            else:
+                decay = np.exp(-zeta * w_n * t)
+                cos_t = np.cos(w_d * t)
+                sin_t = np.sin(w_d * t)
+                x = decay * (A * cos_t + B * sin_t)
+                if derivatives:
+                    v = decay * (A_v * cos_t + B_v * sin_t)
 
             # envelope
-            combined_amp = np.sqrt(A ** 2 + B ** 2)
             upper_envelope = combined_amp * decay
-            return x, upper_envelope
+            return x, upper_envelope, v
         def cal_critically_damped():
             A = x0
             B = v0 + w_n * x0
-            x = (A + B * t) * np.exp(-w_n * t)
-            return x
+            # v = (v0 - w_n*B*t) * e^(-w_n*t)
+            if workspace is not None:
+                decay, x, v = workspace.scratch, workspace.x, workspace.v
+                np.multiply(t, -w_n, out=decay)
+                np.exp(decay, out=decay)
+                np.multiply(t, B, out=x)
+                x += A
+                x *= decay
+                if derivatives:
+                    np.multiply(t, -w_n * B, out=v)
+                    v += v0
+                    v *= decay
+                return x, v
+            decay = np.exp(-w_n * t)
+            x = (A + B * t) * decay
+            v = (v0 - w_n * B * t) * decay if derivatives else None
+            return x, v
         def cal_overdamped():
             r1 = -w_n * (zeta - np.sqrt(zeta ** 2 - 1))
             r2 = -w_n * (zeta + np.sqrt(zeta ** 2 - 1))
@@ -61,8 +299,26 @@ class OscillatorMath:
             """
             B = (v0 - r1 * x0) / (r2 - r1)
             A = x0 - B
-            x = A * np.exp(r1 * t) + B * np.exp(r2 * t)
-            return x
+            # v = A*r1*e^(r1*t) + B*r2*e^(r2*t)
+            if workspace is not None:
+                slow, x, v = workspace.scratch, workspace.x, workspace.v
+                np.multiply(t, r1, out=slow)
+                np.exp(slow, out=slow)
+                slow *= A
+                np.multiply(t, r2, out=x)
+                np.exp(x, out=x)
+                x *= B
+                if derivatives:
+                    np.multiply(x, r2, out=v)
+                    np.multiply(slow, r1, out=workspace.a)
+                    v += workspace.a
+                x += slow
+                return x, v
+            slow = A * np.exp(r1 * t)
+            fast = B * np.exp(r2 * t)
+            x = slow + fast
+            v = r1 * slow + r2 * fast if derivatives else None
+            return x, v
 
         def cal_critical_points(count: int = 2):
             """
@@ -126,10 +382,76 @@ class OscillatorMath:
 
             return results
 
-        if self.t is None:
+        def cal_all_critical_points():
+            """
+            every zero, peak and valley inside [t[0], t[-1]], in closed form
+            :return: dict{'zeros':(n,2),'peaks':(n,2),'valleys':(n,2)} arrays of (t, x)
+            """
+            t_start, t_end = t[0], t[-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if zeta < 1.0:
+                    w_d = w_n * np.sqrt(1 - zeta ** 2)
+                    decay_rate = zeta * w_n
+                    A = x0
+                    B = (v0 + zeta * w_n * x0) / w_d
+                    A_v = v0
+                    B_v = -w_n * (zeta * v0 + w_n * x0) / w_d
+                    period = np.pi / w_d
+
+                    def find_roots(coeff_cos, coeff_sin):
+                        # same first root as find_roots above, then every half period up to t_end
+                        first_angle = np.arctan2(-coeff_cos, coeff_sin)
+                        if first_angle < 0:
+                            first_angle += np.pi
+                        t_base = first_angle / w_d
+                        n = np.arange(np.ceil((t_start - t_base) / period), np.floor((t_end - t_base) / period) + 1)
+                        return t_base + n * period
+
+                    t_zeros = find_roots(A, B)
+                    t_extrema = find_roots(A_v, B_v)
+                    x_extrema = np.exp(-decay_rate * t_extrema) * (A * np.cos(w_d * t_extrema) +
+                                                                   B * np.sin(w_d * t_extrema))
+                elif np.isclose(zeta, 1.0):
+                    # x=(A+B*t)*e^(-w_n*t), v=(v0-w_n*B*t)*e^(-w_n*t)
+                    A = x0
+                    B = v0 + w_n * x0
+                    t_zeros = np.array([-A / B])
+                    t_extrema = np.array([v0 / (w_n * B)])
+                    x_extrema = (A + B * t_extrema) * np.exp(-w_n * t_extrema)
+                else:
+                    # x=A*e^(r1*t)+B*e^(r2*t), at most one zero and one extremum
+                    r1 = -w_n * (zeta - np.sqrt(zeta ** 2 - 1))
+                    r2 = -w_n * (zeta + np.sqrt(zeta ** 2 - 1))
+                    B = (v0 - r1 * x0) / (r2 - r1)
+                    A = x0 - B
+                    t_zeros = np.array([np.log(-B / A) / (r1 - r2)])
+                    t_extrema = np.array([np.log(-B * r2 / (A * r1)) / (r1 - r2)])
+                    x_extrema = A * np.exp(r1 * t_extrema) + B * np.exp(r2 * t_extrema)
+
+            in_range = np.isfinite(t_zeros) & (t_zeros >= t_start) & (t_zeros <= t_end)
+            t_zeros = t_zeros[in_range]
+            in_range = np.isfinite(t_extrema) & (t_extrema >= t_start) & (t_extrema <= t_end)
+            t_extrema, x_extrema = t_extrema[in_range], x_extrema[in_range]
+            is_peak = x_extrema > 0
+            return {
+                'zeros': np.column_stack((t_zeros, np.zeros_like(t_zeros))),
+                'peaks': np.column_stack((t_extrema[is_peak], x_extrema[is_peak])),
+                'valleys': np.column_stack((t_extrema[~is_peak], x_extrema[~is_peak]))
+            }
+
+        if workspace is not None:
+            if derivatives and workspace.v is None:
+                raise ValueError("workspace has no v / a buffers, create it with derivatives=True")
+            t = workspace.t
+        elif adaptive:
+            t = self.adaptive_grid()
+        elif self.t is None:
             t = np.linspace(0, 10, 500)
         else:
             t = self.t
+        method = self.integrator_method()
+        if method is not None:
+            return self.cal_integrated(t, method, derivatives, workspace)
         if self.x0 == 0.0 and self.v0 == 0.0:
             x0 = 1.0
         else:
@@ -139,23 +461,158 @@ class OscillatorMath:
         # damping ratio
         w_n = np.sqrt(k / m)
         # natural frequency
+        dt = None
+        if workspace is not None:
+            pass
+        elif uniform is None and t.size >= RECURRENCE_MIN_SIZE:
+            dt = uniform_step(t)
+        elif uniform:
+            dt = (t[-1] - t[0]) / (t.size - 1)
         results=dict()
         if zeta < 1.0:
             # underdamped
-            x, envelope = cal_underdamped()
-            crit_points = cal_critical_points()
+            x, envelope, v = cal_underdamped()
+            crit_points = cal_all_critical_points() if all_crit_points else cal_critical_points()
             results.update({'crit_points':crit_points, 'envelope':envelope})
         elif np.isclose(zeta, 1.0):
             # critically damped
-            x = cal_critically_damped()
-            results.update({'crit_points': None, 'envelope': None})
+            x, v = cal_critically_damped()
+            crit_points = cal_all_critical_points() if all_crit_points else None
+            results.update({'crit_points': crit_points, 'envelope': None})
         elif zeta > 1.0:
             # overdamped
-            x = cal_overdamped()
-            results.update({'crit_points': None, 'envelope': None})
+            x, v = cal_overdamped()
+            crit_points = cal_all_critical_points() if all_crit_points else None
+            results.update({'crit_points': crit_points, 'envelope': None})
         else:
             return -1
-        results.update({'x':x})
+        results.update({'x':x, 't':t})
+        if derivatives:
+            # a = -(c*v + k*x)/m, no transcendental work left
+            if workspace is not None:
+                a = workspace.a
+                np.multiply(x, -k / m, out=a)
+                np.multiply(v, -c / m, out=workspace.scratch)
+                a += workspace.scratch
+            else:
+                a = -(c * v + k * x) / m
+            results.update({'v': v, 'a': a})
+        return results
+
+    def cal_integrated(self, t, method: str, derivatives: bool = False, workspace: CalculateWorkspace | None = None):
+        """
+        calculate through the integrator, same result keys
+        """
+        x0 = self.x0
+        # without forcing, no initial condition -> unit displacement like the closed form; forced it starts at rest
+        if self.forcing is None and self.x0 == 0.0 and self.v0 == 0.0:
+            x0 = 1.0
+        solution = integrate_batch(self.mass, self.stiffness, self.damping_coefficient, x0, self.v0, t,
+                                   self.cubic_stiffness, self.friction_force, self.forcing, method)
+        x, v, a = solution['x'][0], solution['v'][0], solution['a'][0]
+        if workspace is not None:
+            workspace.x[:] = x
+            workspace.envelope.fill(np.nan)
+            x = workspace.x
+            if derivatives:
+                workspace.v[:], workspace.a[:] = v, a
+                v, a = workspace.v, workspace.a
+        results = {'x': x, 't': t, 'envelope': None, 'crit_points': None}
+        if derivatives:
+            results.update({'v': v, 'a': a})
         return results
 
+    def calculate_batch(self, mass=None, stiffness=None, damping_coefficient=None, x0=None, v0=None, t=None,
+                        out=None, envelope_out=None, solver: str | None = None, derivatives: bool = False):
+        """
+        vectorized calculate over many parameter sets in one pass.
+        every parameter is scalar or 1-D array (broadcast against each other),
+        missing ones fall back to the current attributes.
+        t: (n_t,) shared by every row, or (n_params, n_t) one grid per row (closed form only)
+        out / envelope_out: (n_params, n_t) buffers to fill instead of allocating, e.g. reused across sweep chunks
+        solver: overrides self.solver, an integrator also uses the cubic_stiffness / friction_force / forcing
+                attributes (forcing sees the whole batch, see integrator.OscillatorODE)
+        derivatives: also return velocity 'v' (n_params, n_t), from the same terms as x
+        :return: dict{'x':(n_params, n_t), 'envelope':(n_params, n_t), 'zeta':(n_params,), 'regime':(n_params,)}
+                 envelope is nan for rows that are not underdamped, regime is -1 for invalid rows.
+                 integrated: envelope is all nan, plus 'v', 'a' (n_params, n_t)
+        """
+        m = self.mass if mass is None else mass
+        k = self.stiffness if stiffness is None else stiffness
+        c = self.damping_coefficient if damping_coefficient is None else damping_coefficient
+        x0 = self.x0 if x0 is None else x0
+        v0 = self.v0 if v0 is None else v0
+        if t is None:
+            t = np.linspace(0, 10, 500) if self.t is None else self.t
+        m, k, c, x0, v0 = (np.atleast_1d(np.asarray(p, dtype=float)) for p in np.broadcast_arrays(m, k, c, x0, v0))
+        t = np.asarray(t, dtype=float)
+        method = self.integrator_method(solver)
+        if t.ndim == 2 and method is not None:
+            raise ValueError("per-row time grids need the closed form solver")
+        n_t = t.shape[-1]
+        # same rule as calculate: no initial condition -> unit displacement, unless forced
+        if method is None or self.forcing is None:
+            x0 = np.where((x0 == 0.0) & (v0 == 0.0), 1.0, x0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zeta = c / (2 * np.sqrt(k * m))
+            w_n = np.sqrt(k / m)
+        regime = classify_regime(zeta)
+        under = regime == UNDERDAMPED
+        crit = regime == CRITICALLY_DAMPED
+        over = regime == OVERDAMPED
 
+        if out is None:
+            x = np.full((zeta.size, n_t), np.nan)
+        else:
+            x = out
+            x.fill(np.nan)
+        if envelope_out is None:
+            envelope = np.full((zeta.size, n_t), np.nan)
+        else:
+            envelope = envelope_out
+            envelope.fill(np.nan)
+        v = np.full((zeta.size, n_t), np.nan) if derivatives else None
+        if method is not None:
+            solution = integrate_batch(m, k, c, x0, v0, t, self.cubic_stiffness, self.friction_force, self.forcing,
+                                       method)
+            x[:] = solution['x']
+            return {'x': x, 'envelope': envelope, 'zeta': zeta, 'regime': regime, 'v': solution['v'],
+                    'a': solution['a']}
+
+        t_all = t
+        if under.any():
+            z, w, a = zeta[under, None], w_n[under, None], x0[under, None]
+            t = t_all if t_all.ndim == 1 else t_all[under]
+            w_d = w * np.sqrt(1 - z ** 2)
+            B = (v0[under, None] + z * w * a) / w_d
+            decay = np.exp(-z * w * t)
+            cos_t, sin_t = np.cos(w_d * t), np.sin(w_d * t)
+            x[under] = decay * (a * cos_t + B * sin_t)
+            envelope[under] = np.sqrt(a ** 2 + B ** 2) * decay
+            if derivatives:
+                v_0 = v0[under, None]
+                v[under] = decay * (v_0 * cos_t - w * (z * v_0 + w * a) / w_d * sin_t)
+        if crit.any():
+            w, a = w_n[crit, None], x0[crit, None]
+            t = t_all if t_all.ndim == 1 else t_all[crit]
+            B = v0[crit, None] + w * a
+            decay = np.exp(-w * t)
+            x[crit] = (a + B * t) * decay
+            if derivatives:
+                v[crit] = (v0[crit, None] - w * B * t) * decay
+        if over.any():
+            z, w, a = zeta[over, None], w_n[over, None], x0[over, None]
+            t = t_all if t_all.ndim == 1 else t_all[over]
+            r1 = -w * (z - np.sqrt(z ** 2 - 1))
+            r2 = -w * (z + np.sqrt(z ** 2 - 1))
+            B = (v0[over, None] - r1 * a) / (r2 - r1)
+            slow, fast = (a - B) * np.exp(r1 * t), B * np.exp(r2 * t)
+            x[over] = slow + fast
+            if derivatives:
+                v[over] = r1 * slow + r2 * fast
+
+        results = {'x': x, 'envelope': envelope, 'zeta': zeta, 'regime': regime}
+        if derivatives:
+            results['v'] = v
+        return results
@@ -0,0 +1,118 @@
+import numpy as np
+
+from oscillator_math import classify_regime
+from feature_values import overshoot, settling_time
+
+# 参数平面: x = damping coefficient, y = stiffness, mass fixed
+METRICS = ('settling_time', 'overshoot', 'regime')
+
+
+def map_metric(metric: str, mass, stiffness, damping_coefficient):
+    """
+    one metric for arrays of parameter sets (closed forms, settling time by bisection on the closed form)
+    :return: values, regime codes
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zeta = damping_coefficient / (2 * np.sqrt(stiffness * mass))
+        w_n = np.sqrt(stiffness / mass)
+    regime = classify_regime(zeta)
+    if metric == 'settling_time':
+        values = settling_time(zeta, w_n)
+    elif metric == 'overshoot':
+        values = overshoot(zeta)
+    elif metric == 'regime':
+        values = regime.astype(float)
+    else:
+        raise ValueError(f"unknown metric {metric!r}, expected one of {METRICS}")
+    return values, regime
+
+
+class ParamMap:
+    """
+    progressively refined map of one metric over (damping coefficient, stiffness).
+    level 0 evaluates every cell of a coarse grid; each further level doubles the resolution, children
+    inherit their parent's value and only cells whose neighbours differ (regime change, e.g. zeta = 1,
+    or a value jump above tol) are evaluated again, quadtree style.
+    step() does a bounded amount of work, so the caller decides how often to show the partial map.
+    """
+
+    def __init__(self, metric: str, mass: float, c_range=(0.0, 10.0), k_range=(0.1, 10.0), resolution: int = 1024,
+                 coarse: int = 16, tol: float = 0.02):
+        self.metric = metric
+        self.mass = mass
+        self.c_range = c_range
+        self.k_range = k_range
+        self.resolution = resolution
+        self.tol = tol
+        self.size = min(coarse, resolution)
+        # rows = stiffness, columns = damping coefficient (imshow with origin='lower')
+        self.values = np.full((self.size, self.size), np.nan)
+        self.regime = np.zeros((self.size, self.size), dtype=np.int8)
+        self.pending = np.arange(self.size * self.size)
+        self.evaluated = 0
+        self.done = False
+
+    @property
+    def extent(self):
+        return (*self.c_range, *self.k_range)
+
+    def centers(self, flat_index):
+        """
+        :return: stiffness, damping coefficient at the cell centers of the current level
+        """
+        row, col = np.divmod(flat_index, self.size)
+        c0, c1 = self.c_range
+        k0, k1 = self.k_range
+        return k0 + (row + 0.5) * (k1 - k0) / self.size, c0 + (col + 0.5) * (c1 - c0) / self.size
+
+    def refine_flags(self):
+        """
+        cells with a neighbour of another regime or a clearly different value
+        """
+        values = self.values
+        finite = values[np.isfinite(values)]
+        # absolute floor relative to a typical value, so near-zero plateaus are not refined forever
+        typical = np.median(np.abs(finite)) if finite.size else 0.0
+        flags = np.zeros(values.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for axis in (0, 1):
+                a = np.delete(values, -1, axis=axis)
+                b = np.delete(values, 0, axis=axis)
+                # equal infinities (c = 0: never settles) are not an edge
+                close = (a == b) | np.isclose(a, b, rtol=self.tol, atol=self.tol * typical)
+                edge = ~close | (np.diff(self.regime, axis=axis) != 0)
+                if axis == 0:
+                    flags[:-1] |= edge
+                    flags[1:] |= edge
+                else:
+                    flags[:, :-1] |= edge
+                    flags[:, 1:] |= edge
+        return flags
+
+    def subdivide(self):
+        flags = self.refine_flags()
+        if self.size >= self.resolution or not flags.any():
+            self.done = True
+            return
+        self.size *= 2
+        self.values = np.repeat(np.repeat(self.values, 2, axis=0), 2, axis=1)
+        self.regime = np.repeat(np.repeat(self.regime, 2, axis=0), 2, axis=1)
+        flags = np.repeat(np.repeat(flags, 2, axis=0), 2, axis=1)
+        self.pending = np.flatnonzero(flags)
+
+    def step(self, max_cells: int = 65536):
+        """
+        evaluate up to max_cells pending cells, moving to the next level when the current one is finished
+        :return: number of cells evaluated, 0 when the map is complete
+        """
+        if not self.pending.size and not self.done:
+            self.subdivide()
+        if self.done:
+            return 0
+        cells, self.pending = self.pending[:max_cells], self.pending[max_cells:]
+        k, c = self.centers(cells)
+        values, regime = map_metric(self.metric, self.mass, k, c)
+        self.values.flat[cells] = values
+        self.regime.flat[cells] = regime
+        self.evaluated += cells.size
+        return cells.size
@@ -0,0 +1,123 @@
+import tkinter as tk
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import BoundaryNorm, ListedColormap, LogNorm, Normalize
+from matplotlib.figure import Figure
+
+from chart_window import InputGroup
+from compute_worker import ComputeWorker
+from redraw_scheduler import RedrawScheduler
+from param_map import METRICS, ParamMap
+
+REGIME_LABELS = ['underdamped', 'critical', 'overdamped']
+
+
+class ParamMapWindow(tk.Toplevel):
+    """
+    parameter map: damping coefficient vs stiffness at a fixed mass, coloured by one metric.
+    a coarse grid is shown at once, the worker then refines it step by step (ParamMap.step),
+    every finished step is drawn and the next one submitted, so the window stays responsive.
+    """
+    c_range = (0.0, 10.0)
+    k_range = (0.1, 10.0)
+    resolution = 1024
+    # cells per worker step, ~0.2 s for settling time
+    step_cells = 65536
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Parameter Map")
+        self.geometry("1100x800")
+        self.protocol("WM_DELETE_WINDOW", self.close_window)
+
+        self.left_panel = tk.Frame(self, bg="#f0f0f0", width=260)
+        self.left_panel.pack(side="left", fill="y", padx=10, pady=10)
+        self.left_panel.pack_propagate(False)
+        self.right_panel = tk.Frame(self)
+        self.right_panel.pack(side="right", fill="both", expand=True, padx=10, pady=10)
+
+        # 每次参数变化重新开始 (generation), 旧的细化步骤结果被丢弃
+        self.generation = 0
+        self.pmap = None
+        self.worker = ComputeWorker(self, self.apply_map)
+        self.scheduler = RedrawScheduler(self, self.start_map, max_fps=10.0)
+
+        tk.Label(self.left_panel, text="Colour by", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.metric = tk.StringVar(value=METRICS[0])
+        tk.OptionMenu(self.left_panel, self.metric, *METRICS, command=lambda _: self.scheduler.request()).pack(
+            fill="x", pady=5)
+        self.mass_input = InputGroup(self.left_panel, "Mass", 0, self.scheduler.request)
+        self.mass_input.pack(fill="x", pady=10)
+        self.status = tk.Label(self.left_panel, text="", bg="#f0f0f0", justify="left")
+        self.status.pack(anchor="w", pady=10)
+        tk.Button(self.left_panel, text="Close", command=self.close_window, bg="#ffcccc").pack(side="bottom",
+                                                                                               fill="x", pady=10)
+
+        self.build_figure()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.right_panel)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.start_map()
+
+    def build_figure(self, figsize=(7, 6)):
+        self.fig = Figure(figsize=figsize, dpi=100)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_xlabel("Damping coefficient")
+        self.ax.set_ylabel("Stiffness")
+        extent = (*self.c_range, *self.k_range)
+        self.image = self.ax.imshow(np.full((1, 1), np.nan), origin='lower', extent=extent, aspect='auto',
+                                    interpolation='nearest')
+        self.image.cmap.set_bad('lightgrey')
+        # zeta = 1: c = 2*sqrt(k*m)
+        self.critical_line, = self.ax.plot([], [], 'w--', linewidth=1, label='zeta = 1')
+        self.ax.set_xlim(*self.c_range)
+        self.ax.set_ylim(*self.k_range)
+        self.ax.legend(loc='upper right')
+        self.colorbar = self.fig.colorbar(self.image, ax=self.ax)
+
+    def start_map(self):
+        metric = self.metric.get()
+        mass = max(self.mass_input.get_value(), 1e-6)
+        self.generation += 1
+        self.pmap = ParamMap(metric, mass, self.c_range, self.k_range, self.resolution)
+
+        self.image.set_data(np.ma.masked_invalid(self.pmap.values))
+        k = np.linspace(*self.k_range, 200)
+        self.critical_line.set_data(2 * np.sqrt(k * mass), k)
+        if metric == 'regime':
+            self.image.set_cmap(ListedColormap(['tab:blue', 'tab:green', 'tab:red']))
+            self.image.set_norm(BoundaryNorm([-0.5, 0.5, 1.5, 2.5], 3))
+            self.colorbar.update_normal(self.image)
+            self.colorbar.set_ticks([0, 1, 2], labels=REGIME_LABELS)
+        else:
+            self.image.set_cmap('viridis')
+            # settling time spans decades (-> inf at c = 0), limits follow the data in apply_map
+            self.image.set_norm(LogNorm(1.0, 10.0) if metric == 'settling_time' else Normalize(0.0, 1.0))
+            self.colorbar.update_normal(self.image)
+        self.image.cmap.set_bad('lightgrey')
+        self.colorbar.set_label(metric.replace('_', ' '))
+        self.worker.submit(self.refine, self.pmap, self.generation)
+
+    def refine(self, pmap, generation):
+        """runs on the worker thread, one bounded step"""
+        pmap.step(self.step_cells)
+        return pmap, generation
+
+    def apply_map(self, result):
+        pmap, generation = result
+        if generation != self.generation:
+            return
+        values = np.ma.masked_invalid(pmap.values)
+        self.image.set_data(values)
+        if pmap.metric == 'settling_time' and values.count():
+            # the value range only grows while refining
+            self.image.set_clim(values.min(), values.max())
+        self.status.config(text=f"{pmap.size} x {pmap.size} grid\n{pmap.evaluated:,} cells evaluated"
+                                + ("" if pmap.done else "\nrefining..."))
+        self.canvas.draw_idle()
+        if not pmap.done:
+            self.worker.submit(self.refine, pmap, generation)
+
+    def close_window(self):
+        self.scheduler.cancel()
+        self.worker.shutdown()
+        self.destroy()
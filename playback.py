@@ -0,0 +1,143 @@
+import copy
+import time
+
+import numpy as np
+
+# 回放: t, x, v per sample
+FIELDS = ['t', 'x', 'v']
+
+
+class RingBuffer:
+    """
+    fixed-capacity time series, the oldest samples are overwritten.
+    storage and the ordered view are allocated once, memory stays constant however long it runs.
+    """
+
+    def __init__(self, capacity: int, n_fields: int = len(FIELDS)):
+        self.capacity = capacity
+        self.data = np.full((n_fields, capacity), np.nan)
+        self._ordered = np.empty_like(self.data)
+        self.start = 0
+        self.size = 0
+
+    def extend(self, block):
+        """
+        append (n_fields, m) samples
+        """
+        m = block.shape[1]
+        if m >= self.capacity:
+            self.data[:] = block[:, m - self.capacity:]
+            self.start, self.size = 0, self.capacity
+            return
+        end = (self.start + self.size) % self.capacity
+        first = min(m, self.capacity - end)
+        self.data[:, end:end + first] = block[:, :first]
+        self.data[:, :m - first] = block[:, first:]
+        overflow = max(self.size + m - self.capacity, 0)
+        self.start = (self.start + overflow) % self.capacity
+        self.size = min(self.size + m, self.capacity)
+
+    def last(self):
+        return self.data[:, (self.start + self.size - 1) % self.capacity]
+
+    def view(self):
+        """
+        :return: (n_fields, size) oldest first, a view of an internal buffer valid until the next call
+        """
+        head = min(self.size, self.capacity - self.start)
+        self._ordered[:, :head] = self.data[:, self.start:self.start + head]
+        self._ordered[:, head:self.size] = self.data[:, :self.size - head]
+        return self._ordered[:, :self.size]
+
+    def clear(self):
+        self.start = self.size = 0
+
+
+class Playback:
+    """
+    real-time playback of the response.
+    simulated time advances with the wall clock times speed; each frame only the samples revealed since the
+    last frame are evaluated (calculate on that short grid) and pushed into a ring buffer holding the visible
+    window. samples sit on a fixed grid i*dt, dt = window / capacity, so frame jitter does not change them.
+    retune() changes parameters mid-run: the current (x, v) becomes the initial state of the new segment.
+    """
+
+    def __init__(self, om, window: float = 10.0, speed: float = 1.0, capacity: int = 4000):
+        self.window = window
+        self.speed = speed
+        self.dt = window / capacity
+        self.ring = RingBuffer(capacity)
+        self.om = copy.copy(om)
+        self.segment_start = 0.0
+        self.sim_time = 0.0
+        # index of the next sample to evaluate
+        self.next_index = 0
+        self.at_rest = False
+        self._last_wall = None
+        # same rule as calculate: no initial condition -> unit displacement
+        if self.om.x0 == 0.0 and self.om.v0 == 0.0:
+            self.om.x0 = 1.0
+
+    def advance(self, seconds: float):
+        """
+        move simulated time forward, evaluating only the new samples (at most one window of them)
+        :return: number of new samples
+        """
+        self.sim_time += seconds * self.speed
+        stop = int(np.floor(self.sim_time / self.dt)) + 1
+        start = max(self.next_index, stop - self.ring.capacity)
+        if stop <= start:
+            return 0
+        t = np.arange(start, stop) * self.dt
+        self.next_index = stop
+        if self.at_rest:
+            x = v = np.zeros_like(t)
+        else:
+            self.om.t = t - self.segment_start
+            results = self.om.calculate(derivatives=True)
+            x, v = results['x'], results['v']
+        self.ring.extend(np.vstack((t, x, v)))
+        return t.size
+
+    def frame(self, now: float | None = None):
+        """
+        advance by the wall time since the previous frame
+        :return: ring buffer view (t, x, v)
+        """
+        now = time.perf_counter() if now is None else now
+        if self._last_wall is not None:
+            self.advance(now - self._last_wall)
+        elif self.next_index == 0:
+            self.advance(0.0)
+        self._last_wall = now
+        return self.ring.view()
+
+    def pause(self):
+        self._last_wall = None
+
+    def retune(self, params):
+        """
+        new mass / stiffness / damping_coefficient, continuing from the current state
+        """
+        if self.ring.size:
+            t, x, v = self.ring.last()
+        else:
+            t, x, v = 0.0, self.om.x0, self.om.v0
+        self.om.mass, self.om.stiffness, self.om.damping_coefficient = params
+        self.om.x0, self.om.v0 = float(x), float(v)
+        # calculate would turn (0, 0) into a unit displacement, at rest it stays at rest
+        self.at_rest = self.om.x0 == 0.0 and self.om.v0 == 0.0
+        self.segment_start = float(t)
+
+    def bounds(self):
+        """
+        max |x|, max |v| over the visible window and the rest of the current segment.
+        damping only removes energy, so the segment stays inside its initial energy
+        """
+        om = self.om
+        energy = 0.5 * om.stiffness * om.x0 ** 2 + 0.5 * om.mass * om.v0 ** 2
+        x_max, v_max = np.sqrt(2 * energy / om.stiffness), np.sqrt(2 * energy / om.mass)
+        if self.ring.size:
+            _, x, v = self.ring.view()
+            x_max, v_max = max(x_max, np.abs(x).max()), max(v_max, np.abs(v).max())
+        return x_max, v_max
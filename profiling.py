@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# OSCILLATOR_PROFILE=1 switches profiling on at start
+PROFILE_ENV = 'OSCILLATOR_PROFILE'
+PROFILE_LOG = 'profile.log'
+
+_DISABLED = nullcontext()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """
+    named timing spans around the stages of a redraw.
+    while disabled, span() returns one shared no-op context, so the instrumentation costs a method call.
+    keeps totals per stage plus the last `window` samples for the overlay, and the frame rate.
+    """
+
+    def __init__(self, name: str, enabled: bool | None = None, window: int = 60):
+        self.name = name
+        self.enabled = bool(os.environ.get(PROFILE_ENV)) if enabled is None else enabled
+        self.window = window
+        self.totals = {}
+        self.recent = {}
+        self.frame_times = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            total[2] = max(total[2], seconds)
+            self.recent.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def frame(self):
+        """
+        mark the end of a rendered frame
+        """
+        if self.enabled:
+            self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def recent_means(self):
+        with self._lock:
+            return {name: sum(values) / len(values) for name, values in self.recent.items() if values}
+
+    def summary(self):
+        """
+        :return: dict{stage: {'count', 'mean_ms', 'max_ms', 'total_s'}}
+        """
+        with self._lock:
+            return {name: {'count': count, 'mean_ms': total / count * 1e3, 'max_ms': worst * 1e3, 'total_s': total}
+                    for name, (count, total, worst) in self.totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.recent.clear()
+            self.frame_times.clear()
+
+    def dump(self, path: str = PROFILE_LOG):
+        """
+        append the aggregated timings to a log file
+        """
+        lines = [f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {self.name}  fps={self.fps():.1f}"]
+        for name, row in self.summary().items():
+            lines.append(f"    {name:<12} n={row['count']:<7} mean={row['mean_ms']:9.3f} ms  "
+                         f"max={row['max_ms']:9.3f} ms  total={row['total_s']:8.3f} s")
+        with open(path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+
+class PerfOverlay:
+    """
+    FPS and per-stage times drawn in the corner of an axes, only while the profiler is enabled
+    """
+
+    def __init__(self, ax, profiler):
+        self.profiler = profiler
+        self.text = ax.text(0.01, 0.99, '', transform=ax.transAxes, va='top', ha='left', fontsize=8,
+                            family='monospace', bbox={'facecolor': 'white', 'alpha': 0.7, 'edgecolor': 'none'},
+                            visible=False)
+
+    def update(self):
+        if not self.profiler.enabled:
+            if self.text.get_visible():
+                self.text.set_visible(False)
+            return
+        parts = [f"FPS {self.profiler.fps():5.1f}"]
+        parts += [f"{name} {seconds * 1e3:6.2f} ms" for name, seconds in self.profiler.recent_means().items()]
+        self.text.set_text('\n'.join(parts))
+        self.text.set_visible(True)
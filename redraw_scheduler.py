@@ -0,0 +1,57 @@
+import time
+
+
+class RedrawScheduler:
+    """
+    coalesces redraw requests from a Tk window.
+    renders at most once per frame budget through after/after_idle; requests arriving while one
+    is pending are merged into it, so the render always sees the latest state.
+    """
+
+    def __init__(self, widget, render, max_fps: float = 30.0):
+        self.widget = widget
+        self.render = render
+        self.max_fps = max_fps
+        self.requested = 0
+        self.rendered = 0
+        self.coalesced = 0
+        self._pending = None
+        self._last_render = 0.0
+
+    @property
+    def frame_interval(self):
+        return 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+
+    def request(self):
+        self.requested += 1
+        if self._pending is not None:
+            # a frame is already scheduled and will pick up this change
+            self.coalesced += 1
+            return
+        wait = self._last_render + self.frame_interval - time.perf_counter()
+        if wait <= 0:
+            self._pending = self.widget.after_idle(self._run)
+        else:
+            self._pending = self.widget.after(int(wait * 1000) + 1, self._run)
+
+    def _run(self):
+        self._pending = None
+        self._last_render = time.perf_counter()
+        self.rendered += 1
+        self.render()
+
+    def flush(self):
+        """
+        render now if a frame is pending
+        """
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._run()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def stats(self):
+        return {'requested': self.requested, 'rendered': self.rendered, 'coalesced': self.coalesced}
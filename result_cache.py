@@ -0,0 +1,114 @@
+import copy
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from oscillator_math import uniform_step
+
+
+class ResultCache:
+    """
+    LRU memoization around OscillatorMath.calculate.
+    key = quantized parameter tuple + fingerprint of the t grid, results are computed from the quantized values.
+    grid fingerprints are taken once per array object (t must not be modified in place afterwards).
+    bounded by entry count and by the bytes held in result arrays.
+    cached result dicts are shared, callers must not modify them in place.
+    safe to use from compute worker threads.
+    """
+    param_list = ['mass', 'stiffness', 'damping_coefficient', 'x0', 'v0']
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 2 ** 20, decimals: int = 6):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # id(t) -> (weakref to t, fingerprint)
+        self._grids = {}
+
+    def fingerprint(self, t):
+        """
+        uniform grids: (n, t0, t1), otherwise a hash of the samples. memoized per array object
+        """
+        if t is None:
+            return None
+        memo = self._grids.get(id(t))
+        if memo is not None and memo[0]() is t:
+            return memo[1]
+        samples = 'uniform' if uniform_step(t) is not None else hash(t.tobytes())
+        fingerprint = t.shape, t.dtype.str, float(t[0]), float(t[-1]), samples
+
+        def forget(ref, key=id(t)):
+            if self._grids.get(key, (None,))[0] is ref:
+                del self._grids[key]
+
+        self._grids[id(t)] = (weakref.ref(t, forget), fingerprint)
+        return fingerprint
+
+    @staticmethod
+    def result_size(results):
+        size = 0
+        for v in results.values():
+            if isinstance(v, dict):
+                size += sum(p.nbytes for p in v.values() if isinstance(p, np.ndarray))
+            elif isinstance(v, np.ndarray):
+                size += v.nbytes
+        return size
+
+    def key(self, om, **kwargs):
+        params = tuple(round(float(getattr(om, p)), self.decimals) for p in self.param_list)
+        # integrator terms, the forcing callable by identity
+        model = om.solver, om.cubic_stiffness, om.friction_force, om.forcing
+        return params, model, self.fingerprint(om.t), tuple(sorted(kwargs.items()))
+
+    def get(self, key):
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def put(self, key, results):
+        size = self.result_size(results)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self.result_size(self._entries.pop(key))
+            self._entries[key] = results
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.nbytes -= self.result_size(old)
+
+    def calculate(self, om, **kwargs):
+        """
+        cached om.calculate(**kwargs)
+        """
+        key = self.key(om, **kwargs)
+        results = self.get(key)
+        if results is None:
+            # from the quantized values, a hit returns exactly what this miss computes
+            om = copy.copy(om)
+            for name, value in zip(self.param_list, key[0]):
+                setattr(om, name, value)
+            results = om.calculate(**kwargs)
+            if isinstance(results, dict):
+                self.put(key, results)
+        return results
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.nbytes}
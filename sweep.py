@@ -0,0 +1,212 @@
+"""
+parameter sweep over a process pool.
+the parameter table (n, 5: mass, stiffness, damping_coefficient, x0, v0) is split into shards; every worker
+memory-maps the table and the .npy output and writes its rows in place, only shard bounds are pickled.
+completed shards are recorded in <out>_done.npy, so an interrupted sweep continues with --resume:
+
+    python sweep.py out.npy --mass 0.5 10 100 --stiffness 0.1 10 1000 --damping 0 5 100 --workers 8
+    python sweep.py out.npy --params table.npy --kernel trajectory --t-end 20 --n-t 200 --resume
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data_export import PARAM_LIST
+
+SHARD_SIZE = 100_000
+# trajectory kernel: a shard is computed in chunks of rows whose temporaries stay within this budget,
+# calculate_batch holds about TRAJECTORY_TEMPORARIES float64 arrays of the chunk's size at its peak
+TRAJECTORY_CHUNK_BYTES = 64 * 2 ** 20
+TRAJECTORY_TEMPORARIES = 6
+# feature_values.extract_features columns that are not already in the parameter table
+FEATURE_COLUMNS = ['regime', 'zeta', 'w_n', 'w_d', 'f_n', 'f_d', 'log_decrement', 'q_factor', 'overshoot',
+                   'peak_time', 'rise_time', 'settling_time']
+
+
+def features_kernel(params, t, out):
+    from feature_values import extract_features
+    frame = extract_features(params[:, 0], params[:, 1], params[:, 2])
+    out[:] = frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def trajectory_kernel(params, t, out):
+    from oscillator_math import OscillatorMath
+    om = OscillatorMath()
+    rows = max(TRAJECTORY_CHUNK_BYTES // (t.size * 8 * TRAJECTORY_TEMPORARIES), 1)
+    # the envelope is not part of the output, one scratch buffer serves every chunk
+    envelope = np.empty((min(rows, len(params)), t.size))
+    for start in range(0, len(params), rows):
+        stop = min(start + rows, len(params))
+        om.calculate_batch(*params[start:stop].T, t=t, out=out[start:stop], envelope_out=envelope[:stop - start])
+
+
+# kernel name -> (function(params, t, out), columns or None = one column per t sample)
+KERNELS = {
+    'features': (features_kernel, FEATURE_COLUMNS),
+    'trajectory': (trajectory_kernel, None),
+}
+
+
+def sweep_paths(path):
+    root = os.path.splitext(path)[0]
+    return {'out': path, 'params': f"{root}_params.npy", 'done': f"{root}_done.npy", 'meta': f"{root}.json"}
+
+
+def grid_table(mass, stiffness, damping_coefficient, x0=1.0, v0=0.0):
+    """
+    full factorial table of the given values (scalars or 1-D arrays), mass varies slowest
+    :return: (n, 5) float64 in PARAM_LIST order
+    """
+    axes = np.meshgrid(*(np.atleast_1d(np.asarray(p, dtype=float)) for p in (mass, stiffness, damping_coefficient,
+                                                                               x0, v0)), indexing='ij')
+    return np.column_stack([a.ravel() for a in axes])
+
+
+def load_table(path):
+    """
+    .npy (n, 5) array or .csv with PARAM_LIST columns (x0 / v0 optional)
+    """
+    if path.lower().endswith('.npy'):
+        return np.load(path)
+    import pandas as pd
+    frame = pd.read_csv(path)
+    frame = frame.reindex(columns=PARAM_LIST).fillna({'x0': 1.0, 'v0': 0.0})
+    return frame.to_numpy(dtype=np.float64)
+
+
+def run_shard(paths, kernel, start, stop, t):
+    """
+    runs in a worker process: reads its slice of the mapped table, writes its slice of the mapped output
+    """
+    params = np.load(paths['params'], mmap_mode='r')[start:stop]
+    out = np.load(paths['out'], mmap_mode='r+')
+    KERNELS[kernel][0](np.asarray(params), t, out[start:stop])
+    out.flush()
+    return stop - start
+
+
+def print_progress(done_rows, total_rows, rows_per_second):
+    eta = (total_rows - done_rows) / rows_per_second if rows_per_second > 0 else float('inf')
+    print(f"\r{done_rows:>12,} / {total_rows:,} rows  {rows_per_second:12,.0f} rows/s  ETA {eta:7.1f} s",
+          end='\n' if done_rows == total_rows else '', flush=True)
+
+
+def run_sweep(path, params=None, kernel: str = 'features', t=None, shard_size: int = SHARD_SIZE,
+              workers: int | None = None, resume: bool = False, progress=print_progress):
+    """
+    :param path: output .npy, (n_rows, n_columns) float64
+    :param params: (n, 5) table, not needed when resuming
+    :param t: time grid of the trajectory kernel
+    :param resume: continue the sweep found at path, shards already done are skipped
+    :return: dict{'out': read-only memmap, 'metadata', 'rows', 'seconds', 'rows_per_second'}
+    """
+    paths = sweep_paths(path)
+    if resume:
+        with open(paths['meta']) as f:
+            metadata = json.load(f)
+        kernel = metadata['kernel']
+        shard_size = metadata['shard_size']
+        t = None if metadata['t'] is None else np.asarray(metadata['t'])
+        n_rows = metadata['n_rows']
+        done = np.load(paths['done'], mmap_mode='r+')
+    else:
+        if kernel not in KERNELS:
+            raise ValueError(f"Unknown kernel: {kernel}")
+        params = np.ascontiguousarray(params, dtype=np.float64)
+        if params.ndim != 2 or params.shape[1] != len(PARAM_LIST):
+            raise ValueError(f"params must be (n, {len(PARAM_LIST)}): {', '.join(PARAM_LIST)}")
+        columns = KERNELS[kernel][1]
+        if columns is None:
+            if t is None:
+                raise ValueError("the trajectory kernel needs a t grid")
+            t = np.asarray(t, dtype=np.float64)
+            columns = [f"x[{i}]" for i in range(t.size)]
+        n_rows = len(params)
+        metadata = {
+            'format_version': 1,
+            'kernel': kernel,
+            'columns': columns,
+            'param_columns': PARAM_LIST,
+            'n_rows': n_rows,
+            'shard_size': shard_size,
+            't': None if t is None else t.tolist(),
+        }
+        np.save(paths['params'], params)
+        np.lib.format.open_memmap(paths['out'], mode='w+', dtype=np.float64,
+                                  shape=(n_rows, len(columns))).flush()
+        done = np.lib.format.open_memmap(paths['done'], mode='w+', dtype=np.uint8,
+                                         shape=(-(-n_rows // shard_size),))
+        with open(paths['meta'], 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+    shards = [(i, i * shard_size, min((i + 1) * shard_size, n_rows)) for i in np.flatnonzero(done == 0)]
+    total = sum(stop - start for _, start, stop in shards)
+    finished = 0
+    failed = []
+    begin = time.perf_counter()
+    if shards:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_shard, paths, kernel, start, stop, t): i for i, start, stop in shards}
+            for future in as_completed(futures):
+                try:
+                    finished += future.result()
+                except Exception as e:
+                    print(f"Shard {futures[future]} failed: {e!r}")
+                    failed.append(futures[future])
+                    continue
+                # only marked once the worker has flushed its rows
+                done[futures[future]] = 1
+                done.flush()
+                if progress is not None:
+                    progress(finished, total, finished / (time.perf_counter() - begin))
+    if failed:
+        raise RuntimeError(f"{len(failed)} shards failed, run again with resume=True to retry them")
+    seconds = time.perf_counter() - begin
+    return {
+        'out': np.load(paths['out'], mmap_mode='r'),
+        'metadata': metadata,
+        'rows': finished,
+        'seconds': seconds,
+        'rows_per_second': finished / seconds if seconds > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='result .npy')
+    parser.add_argument('--params', help='parameter table (.npy or .csv), instead of --mass/--stiffness/--damping')
+    parser.add_argument('--mass', type=float, nargs=3, metavar=('START', 'STOP', 'N'), default=[1.0, 1.0, 1])
+    parser.add_argument('--stiffness', type=float, nargs=3, metavar=('START', 'STOP', 'N'), default=[0.1, 10.0, 100])
+    parser.add_argument('--damping', type=float, nargs=3, metavar=('START', 'STOP', 'N'), default=[0.0, 5.0, 100])
+    parser.add_argument('--kernel', choices=list(KERNELS), default='features')
+    parser.add_argument('--t-end', type=float, default=10.0, help='trajectory kernel: grid 0..t_end')
+    parser.add_argument('--n-t', type=int, default=500, help='trajectory kernel: samples per trajectory')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--workers', type=int, help='default: one per CPU')
+    parser.add_argument('--resume', action='store_true', help='continue an interrupted sweep at output')
+    args = parser.parse_args()
+
+    try:
+        if args.resume:
+            result = run_sweep(args.output, resume=True, workers=args.workers)
+        else:
+            if args.params:
+                params = load_table(args.params)
+            else:
+                params = grid_table(*(np.linspace(start, stop, int(n)) for start, stop, n in
+                                      (args.mass, args.stiffness, args.damping)))
+            t = np.linspace(0, args.t_end, args.n_t) if args.kernel == 'trajectory' else None
+            result = run_sweep(args.output, params, args.kernel, t, args.shard_size, args.workers)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted, continue with: python sweep.py {args.output} --resume")
+        return
+    print(f"{result['rows']:,} rows in {result['seconds']:.2f} s ({result['rows_per_second']:,.0f} rows/s), "
+          f"saved {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from oscillator_math import OscillatorMath, SETTLE_TOLERANCE
+
+
+def interpolation_error(params):
+    """
+    max error of linear interpolation on adaptive_grid() against a fine grid, relative to the peak
+    """
+    om = OscillatorMath()
+    om.update_params(params)
+    t = om.adaptive_grid()
+    om.t = t
+    x = om.calculate()['x']
+    om.t = np.linspace(0, t[-1], 200001)
+    reference = om.calculate()['x']
+    return np.abs(np.interp(om.t, t, x) - reference).max() / np.abs(reference).max()
+
+
+@pytest.mark.parametrize('params', [
+    [1.0, 1.0, 2.0, 0.0, 1.0],    # critically damped from a velocity kick
+    [1.0, 1.0, 2.0, 1.0, -3.0],
+    [1.0, 1.0, 10.0, 0.0, 1.0],   # overdamped, fast pole 10x the slow one
+    [1.0, 1.0, 50.0, 1.0, 0.0],
+    [1.0, 1.0, 0.3, 0.0, 1.0],
+    [1.0, 1.0, 0.0, 1.0, 0.0],
+])
+def test_adaptive_grid_resolves_fastest_pole(params):
+    assert interpolation_error(params) <= SETTLE_TOLERANCE
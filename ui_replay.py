@@ -0,0 +1,260 @@
+"""
+headless latency replay for ChartWindow and the Oscillator dashboard.
+a script of parameter changes (scale moves, entry submits, reset) is replayed against an off-screen
+Agg canvas and every event is timed, split into compute / artist update / draw:
+
+    python ui_replay.py                          # built-in drag script, both targets
+    python ui_replay.py --target chart --script events.json --output latency.json
+
+a script is a json list of events: {"action": "scale" | "entry" | "reset", "index": 0, "value": 2.5}
+(index = parameter number, ChartWindow has 5, the dashboard 3: mass, stiffness, damping).
+"""
+import argparse
+import json
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from chart_plot import ChartPlot
+from oscillator_math import OscillatorMath
+from result_cache import ResultCache
+from profiling import Profiler
+
+STAGES = ['compute', 'artist', 'draw']
+
+
+class StageTimer:
+    """
+    accumulates time per stage for the current event; nested calls of the same stage count once
+    """
+
+    def __init__(self):
+        self.current = dict.fromkeys(STAGES, 0.0)
+        self._depth = dict.fromkeys(STAGES, 0)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            self._depth[stage] += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._depth[stage] -= 1
+                if self._depth[stage] == 0:
+                    self.current[stage] += time.perf_counter() - start
+        return timed
+
+    def event(self, fn):
+        """
+        run one event, :return: {'total': s, 'compute': s, 'artist': s, 'draw': s}
+        """
+        self.current = dict.fromkeys(STAGES, 0.0)
+        start = time.perf_counter()
+        fn()
+        total = time.perf_counter() - start
+        sample = dict(self.current)
+        # whatever is neither computation nor rendering: set_data, decimation, relim, widget state
+        sample['artist'] = max(total - sample['compute'] - sample['draw'], 0.0)
+        sample['total'] = total
+        return sample
+
+
+class FakeInput:
+    """stands in for InputGroup (Entry & Scale)"""
+
+    def __init__(self, callback, value=1.0):
+        self.callback = callback
+        self.value = value
+
+    def get_value(self):
+        return self.value
+
+    def set_value(self, val):
+        self.value = val
+
+
+class SyncScheduler:
+    """RedrawScheduler without an event loop: every request renders"""
+
+    def __init__(self, render):
+        self.render = render
+
+    def request(self):
+        self.render()
+
+    def cancel(self):
+        pass
+
+
+class SyncWorker:
+    """ComputeWorker without a thread: the result is applied immediately"""
+
+    def __init__(self, on_result):
+        self.on_result = on_result
+
+    def submit(self, fn, *args):
+        self.on_result(fn(*args))
+
+    def shutdown(self):
+        pass
+
+
+class HeadlessChart(ChartPlot):
+    """
+    ChartWindow's plot pipeline (ChartPlot) on an Agg canvas, inputs / scheduler / worker replaced by synchronous
+    stand-ins
+    """
+
+    def __init__(self, timer, cache=True, overlay: int = 0):
+        self.om = OscillatorMath()
+        self.cache = ResultCache() if cache else ResultCache(max_entries=0)
+        self.scheduler = SyncScheduler(self.update_plot)
+        self.worker = SyncWorker(self.apply_plot)
+        self.inputs = [FakeInput(self.scheduler.request) for _ in range(5)]
+        self.profiler = Profiler('HeadlessChart', enabled=False)
+        # ChartWindow's figure at the size it gets in a 1200x900 window
+        self.build_figure(figsize=(8.8, 8.3))
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.canvas.draw()
+        if overlay:
+            # damping sweep of `overlay` traces, like the Overlay controls
+            self.sweep = ('damping_coefficient', np.linspace(0.1, 4.0, overlay))
+        self.update_plot()
+
+        self.compute = timer.wrap('compute', self.compute)
+        self.compute_sweep = timer.wrap('compute', self.compute_sweep)
+        self.canvas.draw = timer.wrap('draw', self.canvas.draw)
+
+    def apply_event(self, event):
+        action = event['action']
+        if action == 'reset':
+            self.reset_values()
+            return
+        group = self.inputs[event['index']]
+        group.set_value(event['value'])
+        group.callback()
+
+
+class HeadlessDashboard:
+    """
+    the Oscillator.py pyplot dashboard on the Agg backend
+    """
+
+    def __init__(self, timer):
+        from Oscillator import OscillatorDashboard
+        self.dashboard = dashboard = OscillatorDashboard()
+        dashboard.fig.canvas.draw()
+
+        dashboard.om.calculate = timer.wrap('compute', dashboard.om.calculate)
+        canvas = dashboard.fig.canvas
+        canvas.draw = timer.wrap('draw', canvas.draw)
+        dashboard.bm.update = timer.wrap('draw', dashboard.bm.update)
+
+    def apply_event(self, event):
+        action = event['action']
+        if action == 'reset':
+            self.dashboard.reset(None)
+        elif action == 'scale':
+            self.dashboard.sliders[event['index']].set_val(event['value'])
+        elif action == 'entry':
+            self.dashboard.textboxes[event['index']].set_val(str(event['value']))
+
+
+def drag_script(n_params, steps: int = 100, low: float = 0.1, high: float = 10.0, resolution: float = 0.1):
+    """
+    every parameter dragged up and back down on a Scale grid, one entry submit each, then a reset
+    """
+    script = []
+    ramp = np.round(np.linspace(low, high, steps) / resolution) * resolution
+    for index in range(n_params):
+        for value in np.concatenate((ramp, ramp[::-1])):
+            script.append({'action': 'scale', 'index': index, 'value': float(value)})
+        script.append({'action': 'entry', 'index': index, 'value': float(ramp[steps // 3])})
+    script.append({'action': 'reset'})
+    return script
+
+
+DASHBOARD_RANGES = [(0.5, 100.0, 0.01), (0.01, 2.0, 0.01), (0.0, 2.0, 0.01)]
+
+
+def dashboard_script(steps: int = 100):
+    script = []
+    for index, (low, high, resolution) in enumerate(DASHBOARD_RANGES):
+        part = drag_script(1, steps, low, high, resolution)[:-1]
+        for event in part:
+            event['index'] = index
+        script.extend(part)
+    script.append({'action': 'reset'})
+    return script
+
+
+def replay(target, script, timer):
+    samples = []
+    for event in script:
+        samples.append(timer.event(lambda e=event: target.apply_event(e)))
+    return samples
+
+
+def summarize(samples):
+    summary = {}
+    for stage in ['total'] + STAGES:
+        values = np.array([s[stage] for s in samples]) * 1e3
+        summary[stage] = {
+            'p50_ms': float(np.percentile(values, 50)),
+            'p90_ms': float(np.percentile(values, 90)),
+            'p99_ms': float(np.percentile(values, 99)),
+            'max_ms': float(values.max()),
+        }
+    return summary
+
+
+def print_summary(name, summary, n_events):
+    print(f"\n{name}: {n_events} events")
+    print(f"{'stage':<10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, row in summary.items():
+        print(f"{stage:<10}{row['p50_ms']:>10.2f}{row['p90_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['chart', 'dashboard', 'both'], default='both')
+    parser.add_argument('--script', help='json event list, default: built-in drag script')
+    parser.add_argument('--steps', type=int, default=100, help='positions per drag of the built-in script')
+    parser.add_argument('--no-cache', action='store_true', help='ChartWindow without the result cache')
+    parser.add_argument('--overlay', type=int, default=0, help='ChartWindow in overlay mode with N traces')
+    parser.add_argument('--output', help='write per-event samples and percentiles as json')
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    report = {}
+    if args.target in ('chart', 'both'):
+        timer = StageTimer()
+        chart = HeadlessChart(timer, cache=not args.no_cache, overlay=args.overlay)
+        events = script or drag_script(5, args.steps)
+        samples = replay(chart, events, timer)
+        report['chart'] = {'summary': summarize(samples), 'samples': samples}
+        print_summary('ChartWindow', report['chart']['summary'], len(events))
+    if args.target in ('dashboard', 'both'):
+        timer = StageTimer()
+        dashboard = HeadlessDashboard(timer)
+        events = script or dashboard_script(args.steps)
+        samples = replay(dashboard, events, timer)
+        report['dashboard'] = {'summary': summarize(samples), 'samples': samples}
+        print_summary('Oscillator dashboard', report['dashboard']['summary'], len(events))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()